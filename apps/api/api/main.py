@@ -3,25 +3,33 @@ NeuroSync AI Backend - Main FastAPI Application
 Core API routes and application setup
 """
 
+import asyncio
 import logging
+import logging.config
 from contextlib import asynccontextmanager
-from typing import Annotated, List, Optional
+from typing import Annotated, Any, Dict, List, Optional, Tuple
 from fastapi import FastAPI, Depends, HTTPException, status, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 import json
+import orjson
 
 from ..config.settings import get_settings, validate_required_settings
-from ..database.connection import get_database, init_database, check_database_health
+from ..database.connection import db_manager, get_database, init_database, check_database_health
 from ..services.ai_service import AIService
-from ..services.vector_service import VectorService
+from ..services.vector_service import VectorService, SearchResults
 from ..services.ingestion_service import DataIngestionService
 from ..services.auth_service import AuthService
+from ..services.query_cache import QueryCache
+from ..services.project_cache import ProjectCache, ProjectSnapshot
+from ..services.counters import CounterService
 from ..middleware.auth import (
     get_current_verified_user, require_project_read, require_project_write,
-    require_query_tokens, require_ingestion_tokens, log_api_usage
+    require_ingestion_tokens, log_api_usage,
+    QueryContext, query_context, QUERY_TOKEN_ESTIMATE
 )
 from ..models.database import User, Project, Query, UsageLog
 from ..models.requests import (
@@ -31,21 +39,73 @@ from ..models.requests import (
 from ..models.responses import (
     QueryResponse, StreamingQueryResponse, DataIngestionResponse,
     ProjectResponse, ProjectListResponse, SearchResponse, 
-    DocumentResponse, HealthResponse, ErrorResponse
+    DocumentResponse, HealthResponse, ErrorResponse,
+    ProjectSchema, ProjectDetailSchema
 )
 
+# Initialize settings
+settings = get_settings()
+
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.config.dictConfig(settings.get_log_config())
 logger = logging.getLogger(__name__)
 
-# Initialize settings
-settings = get_settings()
+# Settings read on every request, captured once at import time
+AI_MODEL = settings.ai_model
+DEBUG = settings.debug
+CORS_ORIGINS = settings.get_cors_origins()
+IS_PRODUCTION = settings.is_production()
 
 # Initialize services
 ai_service = AIService()
 vector_service = VectorService()
 ingestion_service = DataIngestionService(vector_service, ai_service)
 auth_service = AuthService()
+query_cache = QueryCache(
+    max_size=settings.query_cache_max_size,
+    ttl_seconds=settings.query_cache_ttl
+)
+project_cache = ProjectCache()
+counters = CounterService()
+
+# Latest dependency health, refreshed by a background poller so probes never hit the database
+_health_state: Dict[str, Any] = {"status": "pending", "services": {}}
+
+async def refresh_health_state() -> None:
+    """Probe service dependencies once and store the result in _health_state"""
+    try:
+        # Check database health
+        db_health = await check_database_health()
+        
+        # Check vector store health
+        vector_health = "healthy"  # Add actual vector store health check
+        
+        # Check AI service health
+        ai_health = "healthy"  # Add actual AI service health check
+        
+        services = {
+            **db_health,
+            "vector_store": vector_health,
+            "ai_service": ai_health,
+            "cache": "healthy"  # Add Redis health check when implemented
+        }
+        
+        overall_status = "degraded" if any(
+            status != "healthy" for status in services.values()
+        ) else "healthy"
+        
+    except Exception as e:
+        logger.exception("Health check failed: %s", e)
+        overall_status = "unhealthy"
+        services = {"error": str(e)}
+    
+    _health_state.update(status=overall_status, services=services)
+
+async def _poll_health_loop() -> None:
+    """Refresh _health_state every health_check_interval seconds until cancelled"""
+    while True:
+        await refresh_health_state()
+        await asyncio.sleep(settings.health_check_interval)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -60,36 +120,47 @@ async def lifespan(app: FastAPI):
         # Initialize database
         init_database()
         
+        # Start background health probing and query embedding batching
+        health_task = asyncio.create_task(_poll_health_loop())
+        vector_service.embed_batcher.start()
+        
         logger.info("NeuroSync AI Backend started successfully")
         yield
         
     except Exception as e:
-        logger.error(f"Failed to start application: {str(e)}")
+        logger.exception("Failed to start application: %s", e)
         raise
     
     # Shutdown
     logger.info("Shutting down NeuroSync AI Backend...")
+    health_task.cancel()
+    try:
+        await health_task
+    except asyncio.CancelledError:
+        pass
+    await vector_service.embed_batcher.stop()
 
 # Create FastAPI app
 app = FastAPI(
     title="NeuroSync AI Backend",
     description="AI-powered developer knowledge transfer and project understanding platform",
     version="1.0.0",
-    docs_url="/docs" if settings.debug else None,
-    redoc_url="/redoc" if settings.debug else None,
+    docs_url="/docs" if DEBUG else None,
+    redoc_url="/redoc" if DEBUG else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 # Add middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.get_cors_origins(),
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-if settings.is_production():
+if IS_PRODUCTION:
     app.add_middleware(
         TrustedHostMiddleware,
         allowed_hosts=["neurosync.ai", "*.neurosync.ai", "localhost"]
@@ -99,98 +170,68 @@ if settings.is_production():
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
     """Check application health status"""
-    try:
-        # Check database health
-        db_health = await check_database_health()
-        
-        # Check vector store health
-        vector_health = "healthy"  # Add actual vector store health check
-        
-        # Check AI service health
-        ai_health = "healthy"  # Add actual AI service health check
-        
-        services = {
-            **db_health,
-            "vector_store": vector_health,
-            "ai_service": ai_health,
-            "cache": "healthy"  # Add Redis health check when implemented
-        }
-        
-        overall_status = "healthy" if all(
-            status == "healthy" for status in services.values()
-        ) else "degraded"
-        
-        return HealthResponse(
-            status=overall_status,
-            version=settings.app_version,
-            services=services
-        )
-        
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return HealthResponse(
-            status="unhealthy",
-            version=settings.app_version,
-            services={"error": str(e)}
-        )
+    return HealthResponse(
+        status=_health_state["status"],
+        version=settings.app_version,
+        services=_health_state["services"],
+        cache_stats=query_cache.get_stats()
+    )
 
 # AI Query endpoints
 @app.post("/api/v1/query", response_model=QueryResponse, tags=["AI"])
 async def process_query(
     request: QueryRequest,
-    current_user: Annotated[User, Depends(require_query_tokens)],
-    db: Annotated[Session, Depends(get_database)],
-    background_tasks: BackgroundTasks,
-    _: Annotated[bool, Depends(log_api_usage)]
+    ctx: Annotated[QueryContext, Depends(query_context)]
 ):
     """Process an AI query with context from project knowledge"""
     try:
         # Get relevant context documents
-        context_documents = await vector_service.search_documents(
+        context = await cached_search_documents(
             request.project_id,
             request.query,
             limit=10
         )
         
         # Process query with AI service
-        response = await ai_service.process_query(request, context_documents)
-        
-        # Deduct tokens from user balance
-        if response.success and response.tokens_used > 0:
-            current_user.use_tokens(response.tokens_used)
-            db.commit()
-            
-            # Log usage for analytics
-            background_tasks.add_task(
-                log_token_usage,
-                current_user.id,
-                request.project_id,
-                "ai_query",
-                response.tokens_used,
-                db
-            )
+        response = await ai_service.process_query(request, context.results)
         
         # Save query to database
         query_record = Query(
             query_text=request.query,
             response_text=response.answer,
             context=request.context,
-            sources_used=[doc.get("id") for doc in context_documents],
-            model_used=settings.ai_model,
+            sources_used=context.source_ids,
+            model_used=AI_MODEL,
             tokens_used=response.tokens_used,
             confidence_score=response.confidence,
             response_time_ms=int(response.response_time * 1000),
-            user_id=current_user.id,
+            user_id=ctx.user.id,
             project_id=request.project_id,
             status="completed" if response.success else "failed"
         )
-        db.add(query_record)
-        db.commit()
+        records = [query_record]
+        
+        # Deduct tokens from user balance and log usage for analytics
+        if response.success and response.tokens_used > 0:
+            if not ctx.user.use_tokens(response.tokens_used):
+                raise_insufficient_tokens(ctx, response.tokens_used)
+            records.append(build_usage_log(
+                ctx.user.id,
+                request.project_id,
+                "ai_query",
+                response.tokens_used
+            ))
+        
+        # Persist balance, query and usage log in one transaction
+        ctx.db.add_all(records)
+        ctx.db.commit()
         
         return response
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Query processing failed: {str(e)}")
+        logger.exception("Query processing failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Query processing failed: {str(e)}"
@@ -199,14 +240,12 @@ async def process_query(
 @app.post("/api/v1/query/stream", tags=["AI"])
 async def stream_query(
     request: QueryRequest,
-    current_user: Annotated[User, Depends(require_query_tokens)],
-    db: Annotated[Session, Depends(get_database)],
-    _: Annotated[bool, Depends(log_api_usage)]
+    ctx: Annotated[QueryContext, Depends(query_context)]
 ):
     """Stream an AI query response"""
     try:
         # Get relevant context documents
-        context_documents = await vector_service.search_documents(
+        context = await cached_search_documents(
             request.project_id,
             request.query,
             limit=10
@@ -216,33 +255,41 @@ async def stream_query(
             total_tokens = 0
             response_chunks = []
             
-            async for chunk in ai_service.stream_query(request, context_documents):
-                chunk_data = chunk.dict()
-                response_chunks.append(chunk_data["chunk"])
+            async for chunk in ai_service.stream_query(request, context.results):
+                response_chunks.append(chunk.chunk)
                 
                 if chunk.is_final and chunk.tokens_used:
                     total_tokens = chunk.tokens_used
-                    
-                    # Deduct tokens from user balance
-                    current_user.use_tokens(total_tokens)
-                    db.commit()
                 
-                yield f"data: {json.dumps(chunk_data)}\n\n"
+                yield b"data: " + orjson.dumps(chunk.model_dump()) + b"\n\n"
             
             # Save query to database
             query_record = Query(
                 query_text=request.query,
                 response_text="".join(response_chunks),
                 context=request.context,
-                sources_used=[doc.get("id") for doc in context_documents],
-                model_used=settings.ai_model,
+                sources_used=context.source_ids,
+                model_used=AI_MODEL,
                 tokens_used=total_tokens,
-                user_id=current_user.id,
+                user_id=ctx.user.id,
                 project_id=request.project_id,
                 status="completed"
             )
-            db.add(query_record)
-            db.commit()
+            records = [query_record]
+            
+            # Deduct tokens from user balance and log usage for analytics
+            if total_tokens:
+                ctx.user.use_tokens(total_tokens)
+                records.append(build_usage_log(
+                    ctx.user.id,
+                    request.project_id,
+                    "ai_query",
+                    total_tokens
+                ))
+            
+            # Persist balance, query and usage log in one transaction
+            ctx.db.add_all(records)
+            ctx.db.commit()
         
         return StreamingResponse(
             generate_stream(),
@@ -251,12 +298,77 @@ async def stream_query(
         )
         
     except Exception as e:
-        logger.error(f"Streaming query failed: {str(e)}")
+        logger.exception("Streaming query failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Streaming query failed: {str(e)}"
         )
 
+@app.post("/api/v1/query/batch", response_model=List[QueryResponse], tags=["AI"])
+async def process_query_batch(
+    requests: List[QueryRequest],
+    ctx: Annotated[QueryContext, Depends(query_context)]
+):
+    """Process several AI queries, sharing embedding and vector search work"""
+    check_batch_size(requests)
+    
+    # Check the balance covers the whole batch before any LLM call is made
+    if not ctx.user.can_use_tokens(QUERY_TOKEN_ESTIMATE * len(requests)):
+        raise_insufficient_tokens(ctx, QUERY_TOKEN_ESTIMATE * len(requests))
+    
+    try:
+        # Get relevant context documents for every query in one pass
+        context_batches = await batch_search_documents([
+            (request.project_id, request.query, 10, None) for request in requests
+        ])
+        
+        # Process queries with AI service concurrently
+        responses = await asyncio.gather(*[
+            ai_service.process_query(request, context.results)
+            for request, context in zip(requests, context_batches)
+        ])
+        
+        for request, response, context in zip(requests, responses, context_batches):
+            # Deduct tokens from user balance and log usage for analytics
+            if response.success and response.tokens_used > 0:
+                if not ctx.user.use_tokens(response.tokens_used):
+                    raise_insufficient_tokens(ctx, response.tokens_used)
+                ctx.db.add(build_usage_log(
+                    ctx.user.id,
+                    request.project_id,
+                    "ai_query",
+                    response.tokens_used
+                ))
+            
+            # Save query to database
+            ctx.db.add(Query(
+                query_text=request.query,
+                response_text=response.answer,
+                context=request.context,
+                sources_used=context.source_ids,
+                model_used=AI_MODEL,
+                tokens_used=response.tokens_used,
+                confidence_score=response.confidence,
+                response_time_ms=int(response.response_time * 1000),
+                user_id=ctx.user.id,
+                project_id=request.project_id,
+                status="completed" if response.success else "failed"
+            ))
+        
+        # Persist balances, queries and usage logs in one transaction
+        ctx.db.commit()
+        
+        return list(responses)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Batch query processing failed: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch query processing failed: {str(e)}"
+        )
+
 # Data ingestion endpoints
 @app.post("/api/v1/ingest", response_model=DataIngestionResponse, tags=["Data"])
 async def ingest_data(
@@ -269,7 +381,7 @@ async def ingest_data(
     """Ingest data from various sources into the knowledge base"""
     try:
         # Check project access
-        project = db.query(Project).filter(Project.id == request.project_id).first()
+        project = await project_cache.get(db, request.project_id)
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
         
@@ -278,24 +390,39 @@ async def ingest_data(
         
         # Update project stats
         if response.success:
-            project.document_count += response.items_processed
-            project.last_sync_at = response.timestamp
+            document_count = db.execute(
+                update(Project)
+                .where(Project.id == request.project_id)
+                .values(
+                    document_count=Project.document_count + response.items_processed,
+                    last_sync_at=response.timestamp
+                )
+                .returning(Project.document_count)
+            ).scalar_one()
             db.commit()
             
+            await project_cache.put(ProjectSnapshot(
+                id=project.id,
+                owner_id=project.owner_id,
+                document_count=document_count
+            ))
+            
+            # New documents change search results for this project
+            query_cache.invalidate_project(request.project_id)
+            
             # Log usage
             background_tasks.add_task(
                 log_token_usage,
                 current_user.id,
                 request.project_id,
                 "data_ingestion",
-                5,  # Estimated tokens for ingestion
-                db
+                5  # Estimated tokens for ingestion
             )
         
         return response
         
     except Exception as e:
-        logger.error(f"Data ingestion failed: {str(e)}")
+        logger.exception("Data ingestion failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Data ingestion failed: {str(e)}"
@@ -313,10 +440,7 @@ async def create_project(
     try:
         # Check subscription limits
         user_limits = auth_service.get_user_subscription_limits(current_user)
-        current_project_count = db.query(Project).filter(
-            Project.owner_id == current_user.id,
-            Project.is_active == True
-        ).count()
+        current_project_count = await counters.get_active_projects(current_user.id, db)
         
         if not auth_service.check_subscription_limit(
             current_user, "max_projects", current_project_count
@@ -339,23 +463,22 @@ async def create_project(
         db.commit()
         db.refresh(project)
         
+        await counters.invalidate_active_projects(current_user.id)
+        
+        await project_cache.put(ProjectSnapshot(
+            id=str(project.id),
+            owner_id=str(project.owner_id),
+            document_count=project.document_count or 0
+        ))
+        
         return ProjectResponse(
             success=True,
             message="Project created successfully",
-            project={
-                "id": str(project.id),
-                "name": project.name,
-                "description": project.description,
-                "created_at": project.created_at.isoformat(),
-                "owner_id": str(project.owner_id),
-                "settings": project.settings,
-                "document_count": project.document_count,
-                "is_active": project.is_active
-            }
+            project=ProjectDetailSchema.model_validate(project)
         )
         
     except Exception as e:
-        logger.error(f"Project creation failed: {str(e)}")
+        logger.exception("Project creation failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Project creation failed: {str(e)}"
@@ -374,39 +497,29 @@ async def list_projects(
         # Get projects where user is owner or member
         offset = (page - 1) * page_size
         
-        projects_query = db.query(Project).filter(
+        # Fetch the page and the total match count in one windowed query
+        projects_stmt = select(
+            Project,
+            func.count().over().label("total")
+        ).where(
             Project.owner_id == current_user.id,
             Project.is_active == True
-        ).offset(offset).limit(page_size)
+        ).order_by(Project.created_at.desc()).offset(offset).limit(page_size)
         
-        projects = projects_query.all()
-        total_count = db.query(Project).filter(
-            Project.owner_id == current_user.id,
-            Project.is_active == True
-        ).count()
-        
-        project_list = []
-        for project in projects:
-            project_list.append({
-                "id": str(project.id),
-                "name": project.name,
-                "description": project.description,
-                "created_at": project.created_at.isoformat(),
-                "document_count": project.document_count,
-                "last_sync_at": project.last_sync_at.isoformat() if project.last_sync_at else None
-            })
+        rows = db.execute(projects_stmt).all()
+        total_count = rows[0].total if rows else 0
         
         return ProjectListResponse(
             success=True,
             message="Projects retrieved successfully",
-            projects=project_list,
+            projects=[ProjectSchema.model_validate(project) for project, _total in rows],
             total_count=total_count,
             page=page,
             page_size=page_size
         )
         
     except Exception as e:
-        logger.error(f"Project listing failed: {str(e)}")
+        logger.exception("Project listing failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Project listing failed: {str(e)}"
@@ -427,12 +540,13 @@ async def search_documents(
             raise HTTPException(status_code=400, detail="Project ID is required")
         
         # Search documents
-        results = await vector_service.search_documents(
+        search_results = await cached_search_documents(
             project_id,
             request.query,
             limit=request.limit,
             filters=request.filters
         )
+        results = search_results.results
         
         return SearchResponse(
             success=True,
@@ -443,33 +557,180 @@ async def search_documents(
         )
         
     except Exception as e:
-        logger.error(f"Search failed: {str(e)}")
+        logger.exception("Search failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Search failed: {str(e)}"
         )
 
+@app.post("/api/v1/search/batch", response_model=List[SearchResponse], tags=["Search"])
+async def search_documents_batch(
+    requests: List[SearchRequest],
+    current_user: Annotated[User, Depends(get_current_verified_user)],
+    db: Annotated[Session, Depends(get_database)],
+    _: Annotated[bool, Depends(log_api_usage)]
+):
+    """Search documents for several queries using semantic similarity"""
+    check_batch_size(requests)
+    
+    try:
+        if any(not request.project_id for request in requests):
+            raise HTTPException(status_code=400, detail="Project ID is required")
+        
+        # Search documents
+        result_batches = await batch_search_documents([
+            (request.project_id, request.query, request.limit, request.filters)
+            for request in requests
+        ])
+        
+        return [
+            SearchResponse(
+                success=True,
+                message="Search completed successfully",
+                results=search_results.results,
+                total_count=len(search_results.results),
+                query_time=0.5  # This would be actual query time
+            )
+            for search_results in result_batches
+        ]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Batch search failed: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch search failed: {str(e)}"
+        )
+
 # Utility functions
+def check_batch_size(requests: List[Any]) -> None:
+    """Reject batch requests larger than the configured embedding batch size"""
+    if len(requests) > settings.embedding_batch_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch too large: at most {settings.embedding_batch_size} requests are allowed"
+        )
+
+def raise_insufficient_tokens(ctx: QueryContext, tokens_needed: int) -> None:
+    """Discard the request's pending changes and reject it for an insufficient token balance"""
+    detail = (
+        f"Insufficient token balance. Required: {tokens_needed}, "
+        f"Available: {ctx.user.tokens_remaining}"
+    )
+    ctx.db.rollback()
+    raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail=detail)
+
+def build_usage_log(
+    user_id: str,
+    project_id: str,
+    feature: str,
+    tokens_used: int
+) -> UsageLog:
+    """Build a token usage log record for the caller's transaction"""
+    return UsageLog(
+        user_id=user_id,
+        project_id=project_id,
+        feature=feature,
+        tokens_used=tokens_used,
+        operation_type="api_call"
+    )
+
+async def cached_search_documents(
+    project_id: str,
+    query: str,
+    limit: int = 10,
+    filters: Optional[Dict[str, Any]] = None
+) -> SearchResults:
+    """Search documents, serving repeated and concurrent identical searches from the query cache.
+    
+    Only successful searches are shared and cached; a failed search yields empty
+    results for this request and is retried by the next one.
+    """
+    try:
+        return await query_cache.get_or_compute(
+            QueryCache.make_key(project_id, query, limit, filters),
+            lambda: vector_service.search_documents(
+                project_id,
+                query,
+                limit=limit,
+                filters=filters
+            )
+        )
+    except Exception as e:
+        logger.warning("Search failed for project %s, returning no results: %s", project_id, e)
+        return SearchResults()
+
+async def batch_search_documents(
+    searches: List[Tuple[str, str, int, Optional[Dict[str, Any]]]]
+) -> List[SearchResults]:
+    """Run (project_id, query, limit, filters) searches grouped by project.
+    
+    Cached searches are answered directly. The rest are sent to the vector
+    store one batch per project and filters, with the groups dispatched
+    concurrently. A group that fails gets empty results and is not cached.
+    Results are returned in the order of ``searches``.
+    """
+    ordered: List[Optional[SearchResults]] = [None] * len(searches)
+    cache_keys = [QueryCache.make_key(*search) for search in searches]
+    
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for index, (project_id, _query, _limit, filters) in enumerate(searches):
+        cached = query_cache.get(cache_keys[index])
+        if cached is not None:
+            ordered[index] = cached
+            continue
+        key = (project_id, json.dumps(filters or {}, sort_keys=True))
+        groups.setdefault(key, []).append(index)
+    
+    async def run_group(indices: List[int]) -> Optional[List[SearchResults]]:
+        project_id, _query, _limit, filters = searches[indices[0]]
+        limit = max(searches[i][2] for i in indices)
+        generation = query_cache.generation(project_id)
+        try:
+            batch = await vector_service.batch_search_documents(
+                project_id,
+                [searches[i][1] for i in indices],
+                limit=limit,
+                filters=filters
+            )
+        except Exception as e:
+            logger.warning("Batch search failed for project %s, returning no results: %s", project_id, e)
+            return None
+        # Trim each result list back to the limit its caller asked for
+        trimmed = [
+            SearchResults(results.results[:searches[i][2]], results.source_ids[:searches[i][2]])
+            for i, results in zip(indices, batch)
+        ]
+        for i, results in zip(indices, trimmed):
+            query_cache.put(cache_keys[i], results, generation)
+        return trimmed
+    
+    group_indices = list(groups.values())
+    group_results = await asyncio.gather(*[run_group(indices) for indices in group_indices])
+    
+    for indices, batch in zip(group_indices, group_results):
+        if batch is None:
+            for i in indices:
+                ordered[i] = SearchResults()
+            continue
+        for i, results in zip(indices, batch):
+            ordered[i] = results
+    return ordered
+
 async def log_token_usage(
     user_id: str,
     project_id: str,
     feature: str,
-    tokens_used: int,
-    db: Session
+    tokens_used: int
 ):
-    """Background task to log token usage"""
+    """Background task to log token usage on its own session"""
     try:
-        usage_log = UsageLog(
-            user_id=user_id,
-            project_id=project_id,
-            feature=feature,
-            tokens_used=tokens_used,
-            operation_type="api_call"
-        )
-        db.add(usage_log)
-        db.commit()
+        with db_manager.get_session() as db:
+            db.add(build_usage_log(user_id, project_id, feature, tokens_used))
+            db.commit()
     except Exception as e:
-        logger.error(f"Failed to log token usage: {str(e)}")
+        logger.exception("Failed to log token usage: %s", e)
 
 # Error handlers
 @app.exception_handler(HTTPException)
@@ -485,20 +746,22 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle general exceptions"""
-    logger.error(f"Unhandled exception: {str(exc)}")
+    logger.error("Unhandled exception: %s", exc, exc_info=exc)
     return ErrorResponse(
         success=False,
         message="Internal server error",
         error_code="INTERNAL_ERROR",
-        details={"error": str(exc)} if settings.debug else {}
+        details={"error": str(exc)} if DEBUG else {}
     )
 
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
-        "src.api.main:app",
+        "apps.api.api.main:app",
         host=settings.host,
         port=settings.port,
         reload=settings.reload,
-        workers=settings.workers if not settings.reload else 1
+        workers=settings.workers if not settings.reload else 1,
+        loop="uvloop",
+        http="httptools"
     )
@@ -3,12 +3,28 @@ NeuroSync AI Backend - Configuration Settings
 Centralized configuration management using Pydantic settings
 """
 
+import logging
 import os
-from typing import Optional, List, Union
-from pydantic import Field, field_validator
+from typing import Optional, Tuple, Union
+import orjson
+from pydantic import Field, PrivateAttr, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 
+class OrjsonFormatter(logging.Formatter):
+    """Structured JSON log formatter serialized with orjson"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "name": record.name,
+            "level": record.levelname,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
+
 class Settings(BaseSettings):
     """Application settings with environment variable support"""
     
@@ -28,19 +44,18 @@ class Settings(BaseSettings):
     secret_key: str = Field(default="dev-secret-key-change-in-production", description="Secret key for JWT and encryption")
     jwt_algorithm: str = Field(default="HS256", description="JWT algorithm")
     jwt_expiration_hours: int = Field(default=24, description="JWT token expiration in hours")
-    cors_origins: Union[str, List[str]] = Field(default="*", description="CORS allowed origins")
+    cors_origins: Union[str, Tuple[str, ...]] = Field(default="*", description="CORS allowed origins")
     
     # Admin access tokens (comma-separated list)
     admin_tokens: str = Field(default="admin-dev-token-123,founder-access-456", description="Admin access tokens for dashboard")
     
     @field_validator('cors_origins')
     @classmethod
-    def parse_cors_origins(cls, v):
+    def parse_cors_origins(cls, v) -> Tuple[str, ...]:
+        # Accepts a comma-separated string from the environment; stored as a tuple so settings stay hashable
         if isinstance(v, str):
-            if ',' in v:
-                return [origin.strip() for origin in v.split(',')]
-            return [v.strip()]
-        return v
+            return tuple(origin.strip() for origin in v.split(','))
+        return tuple(v)
     
     # Database settings
     database_pool_size: int = Field(default=5, description="Database connection pool size")
@@ -162,13 +177,38 @@ class Settings(BaseSettings):
     max_concurrent_requests: int = Field(default=100, description="Max concurrent requests")
     request_timeout: int = Field(default=300, description="Request timeout in seconds")
     embedding_batch_size: int = Field(default=50, description="Batch size for embedding generation")
+    query_cache_max_size: int = Field(default=1024, description="Max cached vector search results (0 disables)")
+    query_cache_ttl: int = Field(default=300, description="Vector search result cache TTL in seconds")
+    health_check_interval: int = Field(default=5, description="Seconds between background health probes")
     
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
         case_sensitive=False,
-        extra="ignore"
+        extra="ignore",
+        frozen=True
     )
+    
+    # Derived values, computed once after validation
+    _is_production: bool = PrivateAttr(default=False)
+    _is_development: bool = PrivateAttr(default=False)
+    _redis_url_with_auth: str = PrivateAttr(default="")
+    _log_config: Optional[dict] = PrivateAttr(default=None)
+    
+    @model_validator(mode="after")
+    def precompute_derived_settings(self) -> "Settings":
+        """Materialize values that callers would otherwise re-derive per request"""
+        environment = self.environment.lower()
+        self._is_production = environment == "production"
+        self._is_development = environment == "development"
+        
+        self._redis_url_with_auth = self.redis_url
+        if self.redis_password and "://" in self.redis_url:
+            # Insert password into Redis URL
+            protocol, rest = self.redis_url.split("://", 1)
+            self._redis_url_with_auth = f"{protocol}://:{self.redis_password}@{rest}"
+        
+        return self
 
     def get_database_url(self) -> str:
         """Get database URL with proper formatting"""
@@ -176,44 +216,49 @@ class Settings(BaseSettings):
     
     def get_redis_url(self) -> str:
         """Get Redis URL with authentication if needed"""
-        if self.redis_password:
-            # Insert password into Redis URL
-            if "://" in self.redis_url:
-                protocol, rest = self.redis_url.split("://", 1)
-                return f"{protocol}://:{self.redis_password}@{rest}"
-        return self.redis_url
+        return self._redis_url_with_auth
     
     def is_production(self) -> bool:
         """Check if running in production environment"""
-        return self.environment.lower() == "production"
+        return self._is_production
     
     def is_development(self) -> bool:
         """Check if running in development environment"""
-        return self.environment.lower() == "development"
+        return self._is_development
     
-    def get_cors_origins(self) -> List[str]:
-        """Get CORS origins as a list"""
-        if isinstance(self.cors_origins, str):
-            return [origin.strip() for origin in self.cors_origins.split(",")]
+    def get_cors_origins(self) -> Tuple[str, ...]:
+        """Get CORS origins as a tuple"""
         return self.cors_origins
     
     def get_log_config(self) -> dict:
-        """Get logging configuration"""
+        """Get logging configuration, built once per settings instance"""
+        if self._log_config is None:
+            self._log_config = self._build_log_config()
+        return self._log_config
+    
+    def _build_log_config(self) -> dict:
+        """Build the logging dictConfig for the current log format and level"""
+        formatters = {
+            "default": {
+                "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            },
+        }
+        
+        # JSON formatting is only worth its cost where logs are shipped
+        formatter = "default"
+        if self.log_format == "json" and self._is_production:
+            formatters["json"] = {
+                "()": OrjsonFormatter,
+            }
+            formatter = "json"
+        
         return {
             "version": 1,
             "disable_existing_loggers": False,
-            "formatters": {
-                "default": {
-                    "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-                },
-                "json": {
-                    "()": "pythonjsonlogger.jsonlogger.JsonFormatter",
-                    "format": "%(asctime)s %(name)s %(levelname)s %(message)s"
-                }
-            },
+            "formatters": formatters,
             "handlers": {
                 "default": {
-                    "formatter": self.log_format,
+                    "formatter": formatter,
                     "class": "logging.StreamHandler",
                     "stream": "ext://sys.stdout",
                 },
@@ -260,7 +305,7 @@ class ProductionSettings(Settings):
     log_level: str = "INFO"
     database_echo: bool = False
     reload: bool = False
-    workers: int = 4
+    workers: int = Field(default_factory=lambda: max(2, os.cpu_count() or 2))
 
 class TestingSettings(Settings):
     """Testing environment settings"""
@@ -273,15 +318,19 @@ class TestingSettings(Settings):
 def get_settings_for_environment(env: str) -> Settings:
     """Get settings for specific environment"""
     env = env.lower()
-    
+    if env not in ("development", "production", "testing"):
+        return get_settings()
+    return _get_environment_settings(env)
+
+@lru_cache()
+def _get_environment_settings(env: str) -> Settings:
+    """Build each environment's settings once; every construction re-reads .env"""
     if env == "development":
         return DevelopmentSettings()
     elif env == "production":
         return ProductionSettings()
-    elif env == "testing":
-        return TestingSettings()
     else:
-        return Settings()
+        return TestingSettings()
 
 # Validation functions
 def validate_required_settings():
@@ -5,19 +5,31 @@ Handles all AI-related operations including query processing and response genera
 
 from typing import Dict, Any, List, Optional
 import logging
-import openai
+from openai import AsyncOpenAI
 import asyncio
-from datetime import datetime
+import time
+from functools import lru_cache
+from itertools import islice
+import numpy as np
 import tiktoken
-from enum import Enum
+from enum import Enum, StrEnum
 
-class ModelType(Enum):
-    """AI model types for cost optimization."""
+class ModelType(StrEnum):
+    """AI model types for cost optimization; members are the OpenAI model names."""
     GPT_4O_MINI = "gpt-4o-mini"
     GPT_4O = "gpt-4o"
     GPT_4 = "gpt-4"
     GPT_35_TURBO = "gpt-3.5-turbo"
 
+SYSTEM_PROMPT = """You are NeuroSync AI, an intelligent assistant for developer knowledge transfer.
+You help developers understand codebases, projects, and technical documentation.
+Provide clear, accurate, and helpful responses based on the provided context."""
+
+EMBEDDING_DIMENSIONS = 1536
+
+# Shared placeholder row returned when embeddings cannot be generated
+_ZERO_EMBEDDING = np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float32)
+
 class QueryComplexity(Enum):
     """Query complexity levels."""
     SIMPLE = "simple"
@@ -25,17 +37,36 @@ class QueryComplexity(Enum):
     COMPLEX = "complex"
     CRITICAL = "critical"
 
+@lru_cache(maxsize=8)
+def _get_encoding(model_name: str) -> tiktoken.Encoding:
+    """Get the tokenizer for a model, built once per process."""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        # Models unknown to this tiktoken release share the GPT-4 encoding
+        return tiktoken.get_encoding("cl100k_base")
+
 class AIEngine:
     """
     Main AI engine for processing queries and generating responses.
     Integrates with OpenAI models and provides cost optimization.
     """
     
+    # Model upgrades by (user tier, complexity); everything else uses GPT-4o mini.
+    # Enterprise gets premium models for complex work, professional only for critical
+    # queries, and starter stays cost-optimized.
+    _MODEL_TABLE = {
+        ("enterprise", QueryComplexity.CRITICAL): ModelType.GPT_4O,
+        ("enterprise", QueryComplexity.COMPLEX): ModelType.GPT_4O,
+        ("professional", QueryComplexity.CRITICAL): ModelType.GPT_4O,
+    }
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """Initialize the AI Engine with optional configuration."""
         self.config = config or {}
         self.logger = logging.getLogger(__name__)
         self.openai_api_key = self.config.get("openai_api_key")
+        self.client: Optional[AsyncOpenAI] = None
         
         # Model configurations with pricing (per 1k tokens)
         self.model_configs = {
@@ -65,16 +96,40 @@ class AIEngine:
             }
         }
         
+        # Per-token rates and quality score, flattened for the per-request cost math
+        self._cost_table = {
+            model: (config["input_cost"] / 1000.0, config["output_cost"] / 1000.0, config["quality_score"])
+            for model, config in self.model_configs.items()
+        }
+        
         self.initialize_models()
     
     def initialize_models(self) -> None:
         """Initialize AI models and other required resources."""
         self.logger.info("Initializing AI models...")
         if self.openai_api_key:
-            openai.api_key = self.openai_api_key
+            # One pooled client for the engine's lifetime
+            self.client = AsyncOpenAI(
+                api_key=self.openai_api_key,
+                max_retries=2,
+                timeout=self.config.get("ai_timeout", 60)
+            )
             self.logger.info("OpenAI API key configured")
         else:
             self.logger.warning("OpenAI API key not provided - AI functionality will be limited")
+        
+        # Build tokenizers up front so count_tokens only encodes
+        for model in self.model_configs:
+            try:
+                _get_encoding(model)
+            except Exception as e:
+                self.logger.warning("Failed to load tokenizer for %s: %s", model, e)
+        
+        # The system prompt never changes, so count its tokens once per model
+        self._system_prompt_tokens = {
+            model: self.count_tokens(SYSTEM_PROMPT, model)
+            for model in self.model_configs
+        }
     
     def analyze_query_complexity(self, query: str, context: Optional[Dict[str, Any]] = None) -> QueryComplexity:
         """
@@ -88,7 +143,7 @@ class AIEngine:
             QueryComplexity enum value
         """
         query_length = len(query)
-        word_count = len(query.split())
+        word_count = query.count(" ") + 1  # Approximate; avoids allocating the split list
         
         # Simple heuristics for complexity analysis
         if query_length < 50 and word_count < 10:
@@ -117,28 +172,7 @@ class AIEngine:
         Returns:
             Optimal ModelType for the query
         """
-        # Enterprise users get premium models
-        if user_tier == "enterprise":
-            if complexity in [QueryComplexity.CRITICAL, QueryComplexity.COMPLEX]:
-                return ModelType.GPT_4O
-            else:
-                return ModelType.GPT_4O_MINI
-        
-        # Professional users get balanced optimization
-        elif user_tier == "professional":
-            if complexity == QueryComplexity.CRITICAL:
-                return ModelType.GPT_4O
-            elif complexity == QueryComplexity.COMPLEX:
-                return ModelType.GPT_4O_MINI
-            else:
-                return ModelType.GPT_4O_MINI
-        
-        # Starter users get cost-optimized models
-        else:
-            if complexity == QueryComplexity.CRITICAL:
-                return ModelType.GPT_4O_MINI
-            else:
-                return ModelType.GPT_4O_MINI
+        return self._MODEL_TABLE.get((user_tier, complexity), ModelType.GPT_4O_MINI)
     
     def count_tokens(self, text: str, model: ModelType = ModelType.GPT_4O_MINI) -> int:
         """
@@ -152,11 +186,10 @@ class AIEngine:
             Number of tokens
         """
         try:
-            encoding = tiktoken.encoding_for_model(model.value)
-            return len(encoding.encode(text))
+            return len(_get_encoding(model).encode(text))
         except Exception:
-            # Fallback to simple word count estimation
-            return len(text.split()) * 1.3  # Rough estimation
+            # Tokenizer unavailable - fall back to word count estimation
+            return int((text.count(" ") + 1) * 1.3) if text else 0
     
     async def process_query(
         self, 
@@ -181,7 +214,7 @@ class AIEngine:
         Returns:
             Dict containing the response and metadata
         """
-        start_time = datetime.utcnow()
+        start_time = time.perf_counter()
         
         if not self.openai_api_key:
             return {
@@ -201,34 +234,25 @@ class AIEngine:
             # Select optimal model
             selected_model = self.select_optimal_model(complexity, user_tier)
             
-            # Prepare context
-            context_text = ""
-            if context and context.get("sources"):
+            # Prepare context, limited to the top 5 sources
+            sources = (context or {}).get("sources")
+            if sources:
                 context_text = "\n".join([
                     f"Source: {src.get('title', 'Unknown')}\n{src.get('content', '')}"
-                    for src in context["sources"][:5]  # Limit to top 5 sources
+                    for src in islice(sources, 5)
                 ])
-            
-            # Build prompt
-            system_prompt = """You are NeuroSync AI, an intelligent assistant for developer knowledge transfer. 
-            You help developers understand codebases, projects, and technical documentation.
-            Provide clear, accurate, and helpful responses based on the provided context."""
-            
-            user_prompt = query
-            if context_text:
                 user_prompt = f"Context:\n{context_text}\n\nQuestion: {query}"
-            
-            # Count tokens
-            input_tokens = self.count_tokens(system_prompt + user_prompt, selected_model)
+            else:
+                user_prompt = query
             
             # Make OpenAI API call
             messages = [
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": user_prompt}
             ]
             
-            response = await openai.ChatCompletion.acreate(
-                model=selected_model.value,
+            response = await self.client.chat.completions.create(
+                model=selected_model,
                 messages=messages,
                 max_tokens=max_tokens or 1000,
                 temperature=temperature or 0.7,
@@ -236,28 +260,31 @@ class AIEngine:
             )
             
             if stream:
-                # Handle streaming response
+                # Streamed chunks carry no usage, so count prompt tokens locally
+                input_tokens = (
+                    self._system_prompt_tokens[selected_model] +
+                    self.count_tokens(user_prompt, selected_model)
+                )
                 return await self._handle_streaming_response(response, selected_model, input_tokens, start_time)
             else:
-                # Handle regular response
+                # Handle regular response, using the exact token usage reported by the API
                 response_text = response.choices[0].message.content
-                output_tokens = self.count_tokens(response_text, selected_model)
+                usage = response.usage
+                input_tokens, output_tokens = usage.prompt_tokens, usage.completion_tokens
                 
                 # Calculate cost
-                model_config = self.model_configs[selected_model]
-                input_cost = (input_tokens / 1000) * model_config["input_cost"]
-                output_cost = (output_tokens / 1000) * model_config["output_cost"]
-                total_cost = input_cost + output_cost
+                in_rate, out_rate, quality = self._cost_table[selected_model]
+                total_cost = input_tokens * in_rate + output_tokens * out_rate
                 
-                processing_time = (datetime.utcnow() - start_time).total_seconds()
+                processing_time = time.perf_counter() - start_time
                 
                 return {
                     "response": response_text,
                     "sources": context.get("sources", []) if context else [],
-                    "confidence": model_config["quality_score"],
+                    "confidence": quality,
                     "tokens_used": input_tokens + output_tokens,
                     "cost": round(total_cost, 6),
-                    "model_used": selected_model.value,
+                    "model_used": selected_model,
                     "processing_time": processing_time,
                     "complexity": complexity.value,
                     "optimization_applied": True
@@ -265,7 +292,7 @@ class AIEngine:
                 
         except Exception as e:
             self.logger.error(f"Error processing query: {str(e)}")
-            processing_time = (datetime.utcnow() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             
             return {
                 "response": f"I encountered an error processing your query: {str(e)}",
@@ -283,35 +310,34 @@ class AIEngine:
         response_stream, 
         model: ModelType, 
         input_tokens: int, 
-        start_time: datetime
+        start_time: float
     ) -> Dict[str, Any]:
         """Handle streaming response from OpenAI."""
-        full_response = ""
+        parts = []
         async for chunk in response_stream:
-            if chunk.choices[0].delta.content:
-                full_response += chunk.choices[0].delta.content
+            content = chunk.choices[0].delta.content
+            if content:
+                parts.append(content)
+        full_response = "".join(parts)
         
         output_tokens = self.count_tokens(full_response, model)
-        model_config = self.model_configs[model]
-        
-        input_cost = (input_tokens / 1000) * model_config["input_cost"]
-        output_cost = (output_tokens / 1000) * model_config["output_cost"]
-        total_cost = input_cost + output_cost
+        in_rate, out_rate, quality = self._cost_table[model]
+        total_cost = input_tokens * in_rate + output_tokens * out_rate
         
-        processing_time = (datetime.utcnow() - start_time).total_seconds()
+        processing_time = time.perf_counter() - start_time
         
         return {
             "response": full_response,
             "sources": [],
-            "confidence": model_config["quality_score"],
+            "confidence": quality,
             "tokens_used": input_tokens + output_tokens,
             "cost": round(total_cost, 6),
-            "model_used": model.value,
+            "model_used": model,
             "processing_time": processing_time,
             "streamed": True
         }
     
-    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+    async def generate_embeddings(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for the given texts.
         
@@ -319,24 +345,39 @@ class AIEngine:
             texts: List of input texts to generate embeddings for
             
         Returns:
-            List of embedding vectors
+            float32 array of shape (len(texts), EMBEDDING_DIMENSIONS); the
+            zero-vector fallback is a read-only broadcast view
         """
         if not self.openai_api_key:
             # Return dummy embeddings if no API key
-            return [[0.0] * 1536 for _ in texts]
+            return np.broadcast_to(_ZERO_EMBEDDING, (len(texts), EMBEDDING_DIMENSIONS))
         
         try:
-            response = await openai.Embedding.acreate(
-                model="text-embedding-3-small",
-                input=texts
-            )
+            # Split into request-sized batches and embed them concurrently
+            batch_size = self.config.get("embedding_batch_size", 50)
+            semaphore = asyncio.Semaphore(self.config.get("embedding_max_concurrency", 4))
             
-            return [item.embedding for item in response.data]
+            async def embed_batch(batch: List[str]):
+                async with semaphore:
+                    return await self.client.embeddings.create(
+                        model="text-embedding-3-small",
+                        input=batch
+                    )
+            
+            responses = await asyncio.gather(*[
+                embed_batch(texts[i:i + batch_size])
+                for i in range(0, len(texts), batch_size)
+            ])
+            
+            return np.asarray(
+                [item.embedding for response in responses for item in response.data],
+                dtype=np.float32
+            )
             
         except Exception as e:
             self.logger.error(f"Error generating embeddings: {str(e)}")
             # Return dummy embeddings on error
-            return [[0.0] * 1536 for _ in texts]
+            return np.broadcast_to(_ZERO_EMBEDDING, (len(texts), EMBEDDING_DIMENSIONS))
     
     def get_status(self) -> Dict[str, Any]:
         """Get the current status of the AI engine."""
@@ -365,15 +406,13 @@ class AIEngine:
         estimated_input_tokens = self.count_tokens(query, selected_model)
         estimated_output_tokens = 200  # Average response length
         
-        model_config = self.model_configs[selected_model]
-        input_cost = (estimated_input_tokens / 1000) * model_config["input_cost"]
-        output_cost = (estimated_output_tokens / 1000) * model_config["output_cost"]
-        total_cost = input_cost + output_cost
+        in_rate, out_rate, quality = self._cost_table[selected_model]
+        total_cost = estimated_input_tokens * in_rate + estimated_output_tokens * out_rate
         
         return {
             "estimated_cost": round(total_cost, 6),
-            "selected_model": selected_model.value,
+            "selected_model": selected_model,
             "complexity": complexity.value,
             "estimated_tokens": estimated_input_tokens + estimated_output_tokens,
-            "quality_score": model_config["quality_score"]
+            "quality_score": quality
         }
@@ -3,35 +3,111 @@ Authentication Manager for NeuroSync AI Backend
 Handles JWT authentication, user management, and project access control.
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, List, Any, NamedTuple, Optional, Set
+import asyncio
+import base64
+import binascii
+import hashlib
+import heapq
+import hmac
 import logging
-import jwt
+import os
+import time
+import orjson
+from jose import jwk, jwt
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
 import secrets
 import uuid
-from sqlalchemy.orm import Session
+import weakref
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session, joinedload
 from models.database import User
 from services.database_service import DatabaseService
 
+class _RefreshTokenEntry(NamedTuple):
+    """Issued refresh token state."""
+    user_id: str
+    expires_at: datetime
+    created_at: datetime
+
+def _uuid7() -> uuid.UUID:
+    """Time-ordered UUIDv7 (RFC 9562): 48-bit millisecond timestamp followed by random bits."""
+    ts_ms = time.time_ns() // 1_000_000
+    value = (ts_ms & ((1 << 48) - 1)) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # variant
+    return uuid.UUID(int=value)
+
+# Email lookup compiled once and reused through SQLAlchemy's statement cache
+_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
 class AuthManager:
     """
     Manages authentication, authorization, and user sessions.
     """
     
+    # Live instances, so a user's cached auth state can be dropped from all of them
+    _instances: "weakref.WeakSet[AuthManager]" = weakref.WeakSet()
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None, db_service: Optional[DatabaseService] = None):
         """Initialize the Auth Manager."""
         self.config = config or {}
         self.logger = logging.getLogger(__name__)
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.pwd_context = CryptContext(
+            schemes=["argon2", "bcrypt"],
+            default="argon2",
+            deprecated="auto",
+            argon2__memory_cost=65536,
+            argon2__time_cost=3,
+            argon2__parallelism=2
+        )
         self.secret_key = self.config.get("jwt_secret", "your-secret-key-change-in-production")
         self.algorithm = "HS256"
+        # Signing key and algorithm list reused by every encode/decode
+        self._secret_bytes = self.secret_key.encode()
+        self._algorithms = [self.algorithm]
+        self._jwt_header_b64 = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+        
+        # HMAC signing goes through OpenSSL only with python-jose's cryptography backend
+        if jwk.get_key(self.algorithm).__module__ != "jose.backends.cryptography_backend":
+            self.logger.warning(
+                "python-jose is using its pure-Python HMAC backend; "
+                "install python-jose[cryptography] for faster token signing"
+            )
         self.access_token_expire_minutes = 30
         self.refresh_token_expire_days = 7
+        self._access_ttl_seconds = self.access_token_expire_minutes * 60
+        self._refresh_ttl = timedelta(days=self.refresh_token_expire_days)
         self.db_service = db_service
         
-        # In-memory storage for refresh tokens only
-        self.refresh_tokens = {}
+        # Password hashing is CPU-bound; run it off the event loop across cores
+        self._hash_executor = ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 1,
+            thread_name_prefix="password-hash"
+        )
+        self._dummy_hash = self.pwd_context.hash(secrets.token_urlsafe(24))
+        
+        # In-memory storage for refresh tokens only, with an expiry min-heap for pruning
+        self.refresh_tokens: Dict[bytes, _RefreshTokenEntry] = {}
+        self._refresh_heap: List[tuple] = []
+        
+        # Per-user refresh locks (dropped once unused) and access tokens issued in the last few seconds
+        self._refresh_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._recent_refreshes: TTLCache = TTLCache(maxsize=5000, ttl=5)
+        
+        # Project ids each user can access
+        self.user_projects: Dict[str, set] = {}
+        
+        # Validated access tokens keyed by token digest; entries also expire at the token's exp
+        self._token_cache: TTLCache = TTLCache(maxsize=10000, ttl=60)
+        
+        # User fields needed by validate_token, shared across all of a user's tokens
+        self._user_cache: TTLCache = TTLCache(maxsize=5000, ttl=60)
+        
+        AuthManager._instances.add(self)
     
     def hash_password(self, password: str) -> str:
         """Hash a password."""
@@ -43,28 +119,43 @@ class AuthManager:
     
     def create_access_token(self, data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         """Create a JWT access token."""
-        to_encode = data.copy()
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(minutes=self.access_token_expire_minutes)
-        
-        to_encode.update({"exp": expire, "type": "access"})
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+        ttl_seconds = expires_delta.total_seconds() if expires_delta else self._access_ttl_seconds
+        exp = int(time.time() + ttl_seconds)
+        if self.algorithm == "HS256" and data.keys() == {"sub"}:
+            return self._fast_access_token(data["sub"], exp)
+        
+        to_encode = {**data, "exp": exp, "type": "access"}
+        encoded_jwt = jwt.encode(to_encode, self._secret_bytes, algorithm=self.algorithm)
         return encoded_jwt
     
+    def _fast_access_token(self, user_id: str, exp: int) -> str:
+        """Build an HS256 access token for the fixed {"sub"} claim shape without the generic JWT encoder."""
+        payload_b64 = base64.urlsafe_b64encode(
+            orjson.dumps({"sub": user_id, "exp": exp, "type": "access"})
+        ).rstrip(b"=")
+        signing_input = self._jwt_header_b64 + b"." + payload_b64
+        signature = hmac.new(self._secret_bytes, signing_input, hashlib.sha256).digest()
+        return (signing_input + b"." + base64.urlsafe_b64encode(signature).rstrip(b"=")).decode()
+    
     def create_refresh_token(self, user_id: str) -> str:
         """Create a refresh token."""
-        token_id = secrets.token_urlsafe(32)
-        expire = datetime.utcnow() + timedelta(days=self.refresh_token_expire_days)
+        # Tokens are stored by their raw bytes; clients get the base64url form
+        raw_token = secrets.token_bytes(32)
+        now = datetime.utcnow()
+        expire = now + self._refresh_ttl
         
-        self.refresh_tokens[token_id] = {
-            "user_id": user_id,
-            "expires_at": expire,
-            "created_at": datetime.utcnow()
-        }
+        self.refresh_tokens[raw_token] = _RefreshTokenEntry(user_id, expire, now)
+        heapq.heappush(self._refresh_heap, (expire, raw_token))
+        self._reap_refresh_tokens()
         
-        return token_id
+        return base64.urlsafe_b64encode(raw_token).rstrip(b"=").decode()
+    
+    def _reap_refresh_tokens(self) -> None:
+        """Drop expired refresh tokens in expiry order."""
+        now = datetime.utcnow()
+        while self._refresh_heap and self._refresh_heap[0][0] < now:
+            _, raw_token = heapq.heappop(self._refresh_heap)
+            self.refresh_tokens.pop(raw_token, None)
     
     async def validate_token(self, token: str) -> Dict[str, Any]:
         """
@@ -79,35 +170,80 @@ class AuthManager:
         Raises:
             Exception: If token is invalid or expired
         """
+        cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        cached = self._token_cache.get(cache_key)
+        if cached is not None:
+            expires_at, user_info = cached
+            if time.time() < expires_at:
+                return dict(user_info)
+            self._token_cache.pop(cache_key, None)
+        
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            payload = jwt.decode(token, self._secret_bytes, algorithms=self._algorithms)
             user_id = payload.get("sub")
             token_type = payload.get("type")
             
             if user_id is None or token_type != "access":
                 raise Exception("Invalid token")
             
-            # Get user info from database
-            if not self.db_service:
-                raise Exception("Database service not available")
-            
-            with self.db_service.get_db_session() as db:
-                user = db.query(User).filter(User.id == user_id).first()
-                if not user:
-                    raise Exception("User not found")
+            # Get user info, from the per-user cache when fresh
+            user_info = self._user_cache.get(user_id)
+            if user_info is None:
+                if not self.db_service:
+                    raise Exception("Database service not available")
                 
-                return {
-                    "user_id": str(user.id),
-                    "email": user.email,
-                    "subscription_tier": user.subscription_tier,
-                    "is_active": user.is_active
-                }
+                with self.db_service.get_db_session() as db:
+                    try:
+                        user = db.get(User, uuid.UUID(user_id))
+                    except ValueError:
+                        raise Exception("Invalid token")
+                    if not user:
+                        raise Exception("User not found")
+                    
+                    user_info = {
+                        "user_id": str(user.id),
+                        "email": user.email,
+                        "subscription_tier": user.subscription_tier,
+                        "is_active": user.is_active
+                    }
+                self._user_cache[user_id] = user_info
+            
+            # Only successful validations are cached
+            self._token_cache[cache_key] = (payload.get("exp", float("inf")), user_info)
+            return dict(user_info)
             
         except jwt.ExpiredSignatureError:
             raise Exception("Token has expired")
         except jwt.JWTError:
             raise Exception("Invalid token")
     
+    def invalidate_user(self, user_id: str) -> None:
+        """
+        Drop cached auth state for a user after changes to their status or tier.
+        
+        Args:
+            user_id: User ID
+        """
+        user_id = str(user_id)
+        self._user_cache.pop(user_id, None)
+        stale_keys = [
+            key for key, (_, user_info) in list(self._token_cache.items())
+            if user_info["user_id"] == user_id
+        ]
+        for key in stale_keys:
+            self._token_cache.pop(key, None)
+    
+    @classmethod
+    def invalidate_user_everywhere(cls, user_id: str) -> None:
+        """
+        Drop cached auth state for a user from every AuthManager in this process.
+        
+        Args:
+            user_id: User ID
+        """
+        for manager in list(cls._instances):
+            manager.invalidate_user(user_id)
+    
     async def register_user(
         self,
         email: str,
@@ -134,13 +270,16 @@ class AuthManager:
         # Get database session
         with self.db_service.get_db_session() as db:
             # Check if user already exists
-            existing_user = db.query(User).filter(User.email == email).first()
+            existing_user = db.execute(_USER_BY_EMAIL, {"email": email}).scalar_one_or_none()
             if existing_user:
                 raise Exception("User already exists")
             
             # Create new user
-            user_id = uuid.uuid4()
-            hashed_password = self.hash_password(password)
+            # Time-ordered ids keep primary key inserts on the right edge of the index
+            user_id = _uuid7()
+            hashed_password = await asyncio.get_running_loop().run_in_executor(
+                self._hash_executor, self.hash_password, password
+            )
             
             new_user = User(
                 id=user_id,
@@ -160,13 +299,14 @@ class AuthManager:
             db.refresh(new_user)
             
             # Create tokens
-            access_token = self.create_access_token({"sub": str(user_id)})
-            refresh_token = self.create_refresh_token(str(user_id))
+            uid_str = str(user_id)
+            access_token = self.create_access_token({"sub": uid_str})
+            refresh_token = self.create_refresh_token(uid_str)
             
-            self.logger.info(f"Registered new user: {email} with ID: {user_id}")
+            self.logger.info("Registered new user: %s with ID: %s", email, user_id)
             
             return {
-                "user_id": str(user_id),
+                "user_id": uid_str,
                 "email": email,
                 "subscription_tier": subscription_tier,
                 "access_token": access_token,
@@ -191,22 +331,34 @@ class AuthManager:
         # Get database session
         with self.db_service.get_db_session() as db:
             # Find user by email
-            user = db.query(User).filter(User.email == email).first()
+            user = db.execute(_USER_BY_EMAIL, {"email": email}).scalar_one_or_none()
             
-            if not user or not self.verify_password(password, user.password_hash):
+            # Unknown emails verify against a dummy hash so every failed login costs the same
+            has_password = user is not None and bool(user.password_hash)
+            hash_to_check = user.password_hash if has_password else self._dummy_hash
+            verified, new_hash = await asyncio.get_running_loop().run_in_executor(
+                self._hash_executor, self.pwd_context.verify_and_update, password, hash_to_check
+            )
+            if not has_password or not verified:
                 raise Exception("Invalid credentials")
             
             if not user.is_active:
                 raise Exception("Account is disabled")
             
+            # Rehash legacy bcrypt passwords with argon2id
+            if new_hash:
+                user.password_hash = new_hash
+                db.commit()
+            
             # Create tokens
-            access_token = self.create_access_token({"sub": str(user.id)})
-            refresh_token = self.create_refresh_token(str(user.id))
+            uid_str = str(user.id)
+            access_token = self.create_access_token({"sub": uid_str})
+            refresh_token = self.create_refresh_token(uid_str)
             
-            self.logger.info(f"User authenticated: {email}")
+            self.logger.info("User authenticated: %s", email)
             
             return {
-                "user_id": str(user.id),
+                "user_id": uid_str,
                 "email": user.email,
                 "subscription_tier": user.subscription_tier,
                 "access_token": access_token,
@@ -224,26 +376,53 @@ class AuthManager:
         Returns:
             New access token
         """
-        token_data = self.refresh_tokens.get(refresh_token)
+        self._reap_refresh_tokens()
+        try:
+            raw_token = base64.urlsafe_b64decode(refresh_token + "==")
+        except (binascii.Error, ValueError):
+            raise Exception("Invalid refresh token")
+        
+        token_data = self.refresh_tokens.get(raw_token)
         if not token_data:
             raise Exception("Invalid refresh token")
         
-        if datetime.utcnow() > token_data["expires_at"]:
-            del self.refresh_tokens[refresh_token]
+        if datetime.utcnow() > token_data.expires_at:
+            del self.refresh_tokens[raw_token]
             raise Exception("Refresh token has expired")
         
-        user_id = token_data["user_id"]
-        user = self.users.get(user_id)
-        if not user:
-            raise Exception("User not found")
+        # Concurrent refreshes with the same token share one freshly issued access token
+        cached = self._recent_refreshes.get(raw_token)
+        if cached is not None:
+            return dict(cached)
         
-        # Create new access token
-        access_token = self.create_access_token({"sub": user_id})
+        user_id = token_data.user_id
+        lock = self._refresh_locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            cached = self._recent_refreshes.get(raw_token)
+            if cached is not None:
+                return dict(cached)
+            
+            if not self.db_service:
+                raise Exception("Database service not available")
+            
+            # Primary key lookup; users are not held in memory
+            with self.db_service.get_db_session() as db:
+                user = db.get(User, uuid.UUID(user_id))
+                if not user:
+                    raise Exception("User not found")
+                if not user.is_active:
+                    raise Exception("Account is disabled")
+            
+            # Create new access token
+            access_token = self.create_access_token({"sub": user_id})
+            
+            result = {
+                "access_token": access_token,
+                "token_type": "bearer"
+            }
+            self._recent_refreshes[raw_token] = result
         
-        return {
-            "access_token": access_token,
-            "token_type": "bearer"
-        }
+        return dict(result)
     
     async def has_project_access(self, user_id: str, project_id: str) -> bool:
         """
@@ -256,8 +435,7 @@ class AuthManager:
         Returns:
             True if user has access, False otherwise
         """
-        user_projects = self.user_projects.get(user_id, [])
-        return project_id in user_projects
+        return project_id in self.user_projects.get(user_id, ())
     
     async def grant_project_access(self, user_id: str, project_id: str, role: str = "member") -> None:
         """
@@ -268,12 +446,10 @@ class AuthManager:
             project_id: Project ID
             role: User role in the project
         """
-        if user_id not in self.user_projects:
-            self.user_projects[user_id] = []
-        
-        if project_id not in self.user_projects[user_id]:
-            self.user_projects[user_id].append(project_id)
-            self.logger.info(f"Granted {role} access to project {project_id} for user {user_id}")
+        user_projects = self.user_projects.setdefault(user_id, set())
+        if project_id not in user_projects:
+            user_projects.add(project_id)
+            self.logger.info("Granted %s access to project %s for user %s", role, project_id, user_id)
     
     async def revoke_project_access(self, user_id: str, project_id: str) -> None:
         """
@@ -283,9 +459,55 @@ class AuthManager:
             user_id: User ID
             project_id: Project ID
         """
-        if user_id in self.user_projects and project_id in self.user_projects[user_id]:
-            self.user_projects[user_id].remove(project_id)
-            self.logger.info(f"Revoked access to project {project_id} for user {user_id}")
+        user_projects = self.user_projects.get(user_id)
+        if user_projects and project_id in user_projects:
+            user_projects.discard(project_id)
+            self.logger.info("Revoked access to project %s for user %s", project_id, user_id)
+    
+    async def grant_project_access_bulk(
+        self,
+        user_id: str,
+        project_ids: Iterable[str],
+        role: str = "member"
+    ) -> Set[str]:
+        """
+        Grant a user access to several projects at once.
+        
+        Args:
+            user_id: User ID
+            project_ids: Project IDs to grant
+            role: User role in the projects
+            
+        Returns:
+            Project IDs that were newly granted
+        """
+        user_projects = self.user_projects.setdefault(user_id, set())
+        granted = set(project_ids) - user_projects
+        if granted:
+            user_projects |= granted
+            self.logger.info("Granted %s access to %s projects for user %s", role, len(granted), user_id)
+        return granted
+    
+    async def revoke_project_access_bulk(self, user_id: str, project_ids: Iterable[str]) -> Set[str]:
+        """
+        Revoke a user's access to several projects at once.
+        
+        Args:
+            user_id: User ID
+            project_ids: Project IDs to revoke
+            
+        Returns:
+            Project IDs that were actually revoked
+        """
+        user_projects = self.user_projects.get(user_id)
+        if not user_projects:
+            return set()
+        
+        revoked = user_projects.intersection(project_ids)
+        if revoked:
+            user_projects -= revoked
+            self.logger.info("Revoked access to %s projects for user %s", len(revoked), user_id)
+        return revoked
     
     async def get_user_profile(self, user_id: str) -> Dict[str, Any]:
         """
@@ -301,7 +523,10 @@ class AuthManager:
             raise Exception("Database service not available")
         
         with self.db_service.get_db_session() as db:
-            user = db.query(User).filter(User.id == user_id).first()
+            # Load the user's project memberships in the same query
+            user = db.query(User).options(
+                joinedload(User.projects)
+            ).filter(User.id == user_id).first()
             if not user:
                 raise Exception("User not found")
             
@@ -311,5 +536,6 @@ class AuthManager:
                 "subscription_tier": user.subscription_tier,
                 "is_active": user.is_active,
                 "created_at": user.created_at,
-                "metadata": user.metadata or {}
+                "metadata": user.user_metadata or {},
+                "projects": [str(project.id) for project in user.projects]
             }
@@ -3,19 +3,39 @@ Code Architecture Understanding Service for NeuroSync
 Deep analysis of codebase structure, dependencies, patterns, and architectural insights
 """
 
-import ast
 import re
-import json
 import logging
-from typing import Dict, List, Optional, Any, Set, Tuple
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from collections import defaultdict, Counter
+import hashlib
+import mmap
+import os
+import shelve
+import sys
+from contextlib import contextmanager
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
 
+import numpy as np
+
+# Optional JIT for the component scoring loop; NumPy is used when unavailable
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# The parse cache is shared between processes and is only used when it can be locked
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .arch_parser import parse_python_source
 from .vector_db import VectorDatabase
 from .knowledge_graph import KnowledgeGraphBuilder
 from .context_persistence import ContextPersistenceService, ContextType, ContextScope
@@ -38,7 +58,7 @@ class CodeComplexity(Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CodeComponent:
     """Represents a code component (class, function, module)"""
     name: str
@@ -54,6 +74,161 @@ class CodeComponent:
     docstring: Optional[str]
     patterns: List[ArchitecturalPattern]
 
+# Integer codes used by ComponentTable's columns
+COMPLEXITY_LEVELS: Tuple[CodeComplexity, ...] = tuple(CodeComplexity)
+COMPLEXITY_CODES = {level: code for code, level in enumerate(COMPLEXITY_LEVELS)}
+COMPONENT_TYPES = ('class', 'function', 'module', 'interface')
+COMPONENT_TYPE_CODES = {name: code for code, name in enumerate(COMPONENT_TYPES)}
+UNKNOWN_TYPE_CODE = len(COMPONENT_TYPES)
+
+@dataclass(slots=True, frozen=True)
+class ComponentTable:
+    """Column-oriented view of a list of components for vectorized analysis"""
+    names: List[str]
+    types: np.ndarray  # uint8 COMPONENT_TYPE_CODES
+    start_lines: np.ndarray
+    end_lines: np.ndarray
+    complexity: np.ndarray  # uint8 COMPLEXITY_CODES
+    method_counts: np.ndarray
+    dependency_counts: np.ndarray
+    dependent_counts: np.ndarray
+    
+    @classmethod
+    def from_components(cls, components: List[CodeComponent]) -> "ComponentTable":
+        """Build the table in a single pass over the components"""
+        count = len(components)
+        types = np.empty(count, dtype=np.uint8)
+        start_lines = np.empty(count, dtype=np.int32)
+        end_lines = np.empty(count, dtype=np.int32)
+        complexity = np.empty(count, dtype=np.uint8)
+        method_counts = np.empty(count, dtype=np.int32)
+        dependency_counts = np.empty(count, dtype=np.int32)
+        dependent_counts = np.empty(count, dtype=np.int32)
+        
+        for i, c in enumerate(components):
+            types[i] = COMPONENT_TYPE_CODES.get(c.type, UNKNOWN_TYPE_CODE)
+            start_lines[i] = c.start_line
+            end_lines[i] = c.end_line
+            complexity[i] = COMPLEXITY_CODES[c.complexity]
+            method_counts[i] = len(c.methods)
+            dependency_counts[i] = len(c.dependencies)
+            dependent_counts[i] = len(c.dependents)
+        
+        return cls(
+            names=[c.name for c in components],
+            types=types,
+            start_lines=start_lines,
+            end_lines=end_lines,
+            complexity=complexity,
+            method_counts=method_counts,
+            dependency_counts=dependency_counts,
+            dependent_counts=dependent_counts
+        )
+    
+    @property
+    def line_counts(self) -> np.ndarray:
+        return self.end_lines - self.start_lines
+    
+    def is_type(self, component_type: str) -> np.ndarray:
+        """Boolean mask of components of the given type"""
+        return self.types == COMPONENT_TYPE_CODES[component_type]
+
+# Bit flags returned by _score_components
+SMELL_LARGE_CLASS = 1
+SMELL_GOD_OBJECT = 2
+SMELL_DEAD_CODE = 4
+
+# Code smell thresholds; numba freezes these module globals into the compiled scorer
+LARGE_CLASS_METHODS = 20
+LARGE_CLASS_LINES = 500
+LARGE_CLASS_HIGH_METHODS = 30
+GOD_OBJECT_COUPLING = 15
+GOD_OBJECT_CRITICAL_COUPLING = 25
+
+_CLASS_CODE = COMPONENT_TYPE_CODES['class']
+_FUNCTION_CODE = COMPONENT_TYPE_CODES['function']
+
+def _score_components_numpy(types: np.ndarray, method_counts: np.ndarray, line_counts: np.ndarray,
+                            dependency_counts: np.ndarray, dependent_counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return per-component smell flags and coupling scores"""
+    is_class = types == _CLASS_CODE
+    coupling_scores = dependency_counts + dependent_counts
+    
+    flags = np.zeros(len(types), dtype=np.int8)
+    flags[is_class & ((method_counts > LARGE_CLASS_METHODS) | (line_counts > LARGE_CLASS_LINES))] |= SMELL_LARGE_CLASS
+    flags[coupling_scores > GOD_OBJECT_COUPLING] |= SMELL_GOD_OBJECT
+    flags[(dependent_counts == 0) & (is_class | (types == _FUNCTION_CODE))] |= SMELL_DEAD_CODE
+    return flags, coupling_scores
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _score_components(types, method_counts, line_counts, dependency_counts, dependent_counts):
+        count = len(types)
+        flags = np.zeros(count, dtype=np.int8)
+        coupling_scores = np.empty(count, dtype=np.int32)
+        
+        for i in prange(count):
+            is_class = types[i] == _CLASS_CODE
+            coupling = dependency_counts[i] + dependent_counts[i]
+            coupling_scores[i] = coupling
+            
+            flag = 0
+            if is_class and (method_counts[i] > LARGE_CLASS_METHODS or line_counts[i] > LARGE_CLASS_LINES):
+                flag |= SMELL_LARGE_CLASS
+            if coupling > GOD_OBJECT_COUPLING:
+                flag |= SMELL_GOD_OBJECT
+            if dependent_counts[i] == 0 and (is_class or types[i] == _FUNCTION_CODE):
+                flag |= SMELL_DEAD_CODE
+            flags[i] = flag
+        
+        return flags, coupling_scores
+else:
+    _score_components = _score_components_numpy
+
+@dataclass(slots=True, frozen=True)
+class DependencyGraph:
+    """Dependency graph in CSR form: node i depends on indices[indptr[i]:indptr[i + 1]]"""
+    names: List[str]
+    indptr: np.ndarray
+    indices: np.ndarray
+    
+    @classmethod
+    def from_components(cls, components: List[CodeComponent],
+                        node_ids: Optional[Dict[str, int]] = None) -> "DependencyGraph":
+        """Build the graph with an edge from each component to each of its dependencies"""
+        node_ids = dict(node_ids or {})
+        sources = []
+        targets = []
+        for comp in components:
+            source = node_ids.setdefault(comp.name, len(node_ids))
+            for dependency in comp.dependencies:
+                sources.append(source)
+                targets.append(node_ids.setdefault(dependency, len(node_ids)))
+        
+        node_count = len(node_ids)
+        edges = np.unique(np.array([sources, targets], dtype=np.int32).reshape(2, -1), axis=1)
+        indptr = np.zeros(node_count + 1, dtype=np.int32)
+        np.cumsum(np.bincount(edges[0], minlength=node_count), out=indptr[1:])
+        
+        return cls(names=list(node_ids), indptr=indptr, indices=edges[1].copy())
+    
+    @property
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+    
+    @property
+    def in_degree(self) -> np.ndarray:
+        return np.bincount(self.indices, minlength=len(self.names))
+    
+    def to_dict(self) -> Dict[str, List[str]]:
+        """Materialize the graph as node name -> dependency names"""
+        names = self.names
+        indptr = self.indptr
+        return {
+            names[i]: [names[j] for j in self.indices[indptr[i]:indptr[i + 1]]]
+            for i in np.flatnonzero(self.out_degree)
+        }
+
 @dataclass
 class ArchitecturalInsight:
     """Architectural insight about the codebase"""
@@ -68,6 +243,206 @@ class ArchitecturalInsight:
     affected_components: List[str]
     created_at: datetime
 
+# File parsing is CPU-bound, so it runs in worker processes; created on first use
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    """Get the shared process pool used for file parsing"""
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _parse_pool
+
+# Bump whenever parser output changes so stale cached parses are ignored
+PARSER_VERSION = 3
+
+# Parse results persisted across runs, keyed on file path, mtime, size and parser version
+PARSE_CACHE_PATH = Path.home() / '.neurosync' / 'arch_cache' / 'parses'
+PARSE_CACHE_LOCK_PATH = PARSE_CACHE_PATH.with_name('parses.lock')
+
+@contextmanager
+def _parse_cache_lock(exclusive: bool):
+    """Hold a shared (readers) or exclusive (writer) lock on the parse cache across processes"""
+    PARSE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(PARSE_CACHE_LOCK_PATH, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _read_parse_cache(cache_keys: List[str]) -> Dict[str, Any]:
+    """Look up cached parses, opening the cache read-only under a shared lock"""
+    if fcntl is None or not cache_keys:
+        return {}
+    try:
+        with _parse_cache_lock(exclusive=False):
+            with shelve.open(str(PARSE_CACHE_PATH), flag='r') as cache:
+                return {key: cache[key] for key in cache_keys if key in cache}
+    except Exception as e:
+        # Includes a cache that has not been created yet
+        logger.debug("Parse cache not read: %s", e)
+        return {}
+
+def _write_parse_cache(parses: Dict[str, Any]) -> None:
+    """Store new parses under an exclusive lock"""
+    if fcntl is None or not parses:
+        return
+    try:
+        with _parse_cache_lock(exclusive=True):
+            with shelve.open(str(PARSE_CACHE_PATH), flag='c') as cache:
+                cache.update(parses)
+    except Exception as e:
+        logger.warning("Parse cache not updated: %s", e)
+
+def _parse_cache_key(file_path: str) -> Optional[str]:
+    """Build the parse cache key for a file, or None if the file cannot be stat'ed"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    
+    raw = f"{file_path}\0{stat.st_mtime_ns}\0{stat.st_size}\0{PARSER_VERSION}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+LANGUAGE_BY_EXTENSION = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.java': 'java'
+}
+
+def _split_file_name(file_path: str) -> Tuple[str, str]:
+    """Split a path into file stem and extension without building a Path"""
+    name_start = file_path.rfind('/') + 1
+    dot = file_path.rfind('.')
+    # Same rules as Path.suffix: no extension for dotfiles or dots in directory names
+    if dot <= name_start:
+        return file_path[name_start:], ''
+    return file_path[name_start:dot], file_path[dot:]
+
+def _parse_code_file(file_path: str) -> Optional[Tuple[List[Dict[str, Any]], List[str]]]:
+    """
+    Parse a single code file in a worker process.
+    
+    Returns plain component dicts (enums as their values) so results pickle cheaply;
+    they are turned back into CodeComponent objects in the calling process.
+    """
+    language = LANGUAGE_BY_EXTENSION.get(_split_file_name(file_path)[1].lower())
+    if not language:
+        return None
+    
+    try:
+        source = open(file_path, 'rb')
+    except FileNotFoundError:
+        # Mock file content for demo when the file is not available locally
+        if language == 'python':
+            return _mock_python_file(file_path)
+        return _parse_generic_file(file_path, f"# Mock {language} file content for {file_path}", language)
+    
+    # Map the file instead of reading it so parsing works straight from the page cache
+    with source:
+        if os.fstat(source.fileno()).st_size == 0:
+            return _parse_source(file_path, b'', language)
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            return _parse_source(file_path, content, language)
+
+def _parse_source(file_path: str, content: Any, language: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Parse source bytes based on language"""
+    if language == 'python':
+        return parse_python_source(file_path, content)
+    return _parse_generic_file(file_path, content, language)
+
+def _mock_python_file(file_path: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Mock Python analysis for files that are not available locally"""
+    components = [{
+        'name': f"MockClass_{_split_file_name(file_path)[0]}",
+        'type': 'class',
+        'file_path': file_path,
+        'start_line': 1,
+        'end_line': 50,
+        'complexity': CodeComplexity.MEDIUM.value,
+        'dependencies': ['os', 'sys', 'json'],
+        'dependents': [],
+        'methods': ['__init__', 'process', 'validate'],
+        'attributes': ['data', 'config'],
+        'docstring': "Mock class for demonstration",
+        'patterns': [ArchitecturalPattern.SINGLETON.value]
+    }]
+    
+    dependencies = ['os', 'sys', 'json']
+    return components, dependencies
+
+def _parse_generic_file(file_path: str, content: Any, language: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Parse generic file"""
+    components = [{
+        'name': f"Mock{language.title()}Component_{_split_file_name(file_path)[0]}",
+        'type': 'module',
+        'file_path': file_path,
+        'start_line': 1,
+        'end_line': 30,
+        'complexity': CodeComplexity.LOW.value,
+        'dependencies': [],
+        'dependents': [],
+        'methods': [],
+        'attributes': [],
+        'docstring': f"Mock {language} component",
+        'patterns': []
+    }]
+    
+    return components, []
+
+def _component_from_dict(data: Dict[str, Any]) -> CodeComponent:
+    """Rebuild a CodeComponent from the dict produced by a parser worker"""
+    # Intern dependency names so components share one copy of each name
+    return CodeComponent(**{
+        **data,
+        'dependencies': [sys.intern(name) for name in data['dependencies']],
+        'complexity': CodeComplexity(data['complexity']),
+        'patterns': [ArchitecturalPattern(p) for p in data['patterns']]
+    })
+
+# Name keywords that indicate a pattern, in reporting order
+PATTERN_KEYWORDS = {
+    'controller': ArchitecturalPattern.MVC,
+    'repository': ArchitecturalPattern.REPOSITORY,
+    'factory': ArchitecturalPattern.FACTORY
+}
+_PATTERN_KEYWORD_RE = re.compile('|'.join(map(re.escape, PATTERN_KEYWORDS)))
+
+def _patterns_from_names(component_names: List[str]) -> Tuple[ArchitecturalPattern, ...]:
+    """Detect architectural patterns from lower-cased component names"""
+    # NUL separators keep keyword matches from spanning two names
+    names_blob = '\0'.join(component_names)
+    
+    # One scan over all names, stopping once every keyword has been seen
+    found = set()
+    for match in _PATTERN_KEYWORD_RE.finditer(names_blob):
+        found.add(match.group())
+        if len(found) == len(PATTERN_KEYWORDS):
+            break
+    
+    return tuple(pattern for keyword, pattern in PATTERN_KEYWORDS.items() if keyword in found)
+
+# Knowledge graph writes are sent in chunks of this size, a few at a time
+ENTITY_BATCH_SIZE = 500
+ENTITY_WRITE_CONCURRENCY = 4
+
+def _build_component_entities(project_id: str, components: List[CodeComponent]) -> List[Dict[str, Any]]:
+    """Build knowledge graph entities for code components"""
+    return [{
+        'project_id': project_id,
+        'entity_type': 'code_component',
+        'entity_id': comp.name,
+        'properties': {
+            'type': comp.type,
+            'file_path': comp.file_path,
+            'complexity': comp.complexity.value,
+            'method_count': len(comp.methods),
+            'line_count': comp.end_line - comp.start_line
+        }
+    } for comp in components]
+
 class CodeArchitectureService:
     """
     Production-ready code architecture understanding service
@@ -85,7 +460,6 @@ class CodeArchitectureService:
         self.vector_db = VectorDatabase()
         self.knowledge_graph = KnowledgeGraphBuilder()
         self.context_service = ContextPersistenceService()
-        self.executor = ThreadPoolExecutor(max_workers=4)
         
         # Analysis cache
         self.component_cache: Dict[str, CodeComponent] = {}
@@ -104,33 +478,58 @@ class CodeArchitectureService:
             Comprehensive architecture analysis results
         """
         try:
-            logger.info(f"Starting architecture analysis for {len(file_paths)} files")
+            logger.info("Starting architecture analysis for %d files", len(file_paths))
+            # One timestamp for the whole run, shared by every insight
+            analysis_time = datetime.utcnow()
             
             # Parse all code files
-            components = []
-            dependencies = []
+            file_component_lists = []
+            # Unique dependency names mapped to ids in first-seen order
+            dependency_ids: Dict[str, int] = {}
+            dependency_refs = 0
+            
+            # Parse files across worker processes, reusing cached parses of unchanged files.
+            # The cache is read once up front and written once at the end, each under a lock.
+            loop = asyncio.get_running_loop()
+            cache_keys = [_parse_cache_key(file_path) for file_path in file_paths]
+            cached_parses = await loop.run_in_executor(
+                None, _read_parse_cache, [key for key in cache_keys if key]
+            )
+            new_parses: Dict[str, Any] = {}
+            results = await asyncio.gather(
+                *[
+                    self._analyze_code_file(project_id, file_path, cache_key, cached_parses, new_parses)
+                    for file_path, cache_key in zip(file_paths, cache_keys)
+                ],
+                return_exceptions=True
+            )
+            await loop.run_in_executor(None, _write_parse_cache, new_parses)
             
-            # Process files in batches
-            batch_size = 10
-            for i in range(0, len(file_paths), batch_size):
-                batch = file_paths[i:i + batch_size]
-                batch_results = await asyncio.gather(
-                    *[self._analyze_code_file(project_id, file_path) for file_path in batch],
-                    return_exceptions=True
-                )
+            # Failures are summarized once per run rather than logged per file
+            failures = Counter()
+            for file_path, result in zip(file_paths, results):
+                if isinstance(result, Exception):
+                    failures[type(result).__name__] += 1
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("File analysis failed for %s: %s", file_path, result)
+                    continue
                 
-                for result in batch_results:
-                    if isinstance(result, Exception):
-                        logger.error(f"File analysis failed: {str(result)}")
-                        continue
-                    
-                    if result:
-                        file_components, file_dependencies = result
-                        components.extend(file_components)
-                        dependencies.extend(file_dependencies)
+                if result:
+                    file_components, file_dependencies = result
+                    file_component_lists.append(file_components)
+                    for dependency in file_dependencies:
+                        dependency_ids.setdefault(dependency, len(dependency_ids))
+                    dependency_refs += len(file_dependencies)
+            
+            if failures:
+                logger.error("File analysis failed for %d of %d files: %s",
+                             sum(failures.values()), len(file_paths), dict(failures))
+            
+            components = list(chain.from_iterable(file_component_lists))
+            dependencies = list(dependency_ids)
             
             # Build dependency graph
-            dependency_graph = self._build_dependency_graph(dependencies)
+            dependency_graph = self._build_dependency_graph(components, dependency_ids)
             
             # Detect architectural patterns
             patterns = await self._detect_architectural_patterns(components, dependencies)
@@ -140,7 +539,7 @@ class CodeArchitectureService:
             
             # Generate architectural insights
             insights = await self._generate_architectural_insights(
-                project_id, components, dependencies, patterns
+                project_id, components, dependencies, patterns, analysis_time
             )
             
             # Store results in knowledge graph
@@ -152,12 +551,13 @@ class CodeArchitectureService:
                 'project_id': project_id,
                 'files_analyzed': len(file_paths),
                 'components_found': len(components),
-                'dependencies_found': len(dependencies),
+                'dependencies_found': dependency_refs,
                 'patterns_detected': [p.value for p in patterns],
                 'complexity_analysis': complexity_analysis,
-                'dependency_graph': dependency_graph,
-                'architectural_insights': [asdict(insight) for insight in insights],
-                'analysis_timestamp': datetime.utcnow().isoformat()
+                'dependency_graph': dependency_graph.to_dict(),
+                # Kept as dataclasses; orjson serializes them directly when stored or returned
+                'architectural_insights': insights,
+                'analysis_timestamp': analysis_time.isoformat()
             }
             
             # Store as context
@@ -174,221 +574,168 @@ class CodeArchitectureService:
                 }
             )
             
-            logger.info(f"Architecture analysis completed: {len(components)} components, {len(patterns)} patterns")
+            logger.info("Architecture analysis completed: %d components, %d patterns", len(components), len(patterns))
             return architecture_analysis
             
         except Exception as e:
-            logger.error(f"Architecture analysis failed: {str(e)}")
+            logger.error("Architecture analysis failed: %s", e)
             raise
     
     async def detect_code_smells(self, project_id: str, 
-                                components: List[CodeComponent]) -> List[Dict[str, Any]]:
+                                components: List[CodeComponent],
+                                dependency_graph: Optional[DependencyGraph] = None) -> List[Dict[str, Any]]:
         """
         Detect code smells and potential issues in the architecture
         
         Args:
             project_id: Project identifier
             components: List of code components to analyze
+            dependency_graph: Graph to take coupling from instead of the
+                components' own dependency lists
             
         Returns:
             List of detected code smells
         """
         try:
             code_smells = []
+            if not components:
+                return code_smells
+            
+            # Gather the per-component metrics once into flat arrays
+            table = ComponentTable.from_components(components)
+            method_counts = table.method_counts
+            line_counts = table.line_counts
+            dependency_counts = table.dependency_counts
+            dependent_counts = table.dependent_counts
+            if dependency_graph is not None:
+                node_ids = {name: i for i, name in enumerate(dependency_graph.names)}
+                nodes = np.fromiter((node_ids[name] for name in table.names), dtype=np.int64, count=len(table.names))
+                dependency_counts = dependency_graph.out_degree[nodes].astype(np.int32)
+                dependent_counts = dependency_graph.in_degree[nodes].astype(np.int32)
+            flags, coupling_scores = _score_components(
+                table.types, method_counts, line_counts, dependency_counts, dependent_counts
+            )
             
             # Large class detection
-            for component in components:
-                if component.type == 'class':
-                    method_count = len(component.methods)
-                    line_count = component.end_line - component.start_line
-                    
-                    if method_count > 20 or line_count > 500:
-                        code_smells.append({
-                            'type': 'large_class',
-                            'component': component.name,
-                            'severity': 'high' if method_count > 30 else 'medium',
-                            'metrics': {
-                                'method_count': method_count,
-                                'line_count': line_count
-                            },
-                            'recommendation': 'Consider breaking this class into smaller, more focused classes'
-                        })
+            large_severity = np.where(method_counts > LARGE_CLASS_HIGH_METHODS, 'high', 'medium')
+            for i in np.flatnonzero(flags & SMELL_LARGE_CLASS):
+                code_smells.append({
+                    'type': 'large_class',
+                    'component': table.names[i],
+                    'severity': str(large_severity[i]),
+                    'metrics': {
+                        'method_count': int(method_counts[i]),
+                        'line_count': int(line_counts[i])
+                    },
+                    'recommendation': 'Consider breaking this class into smaller, more focused classes'
+                })
             
             # God object detection (high coupling)
-            for component in components:
-                coupling_score = len(component.dependencies) + len(component.dependents)
-                if coupling_score > 15:
-                    code_smells.append({
-                        'type': 'god_object',
-                        'component': component.name,
-                        'severity': 'critical' if coupling_score > 25 else 'high',
-                        'metrics': {
-                            'coupling_score': coupling_score,
-                            'dependencies': len(component.dependencies),
-                            'dependents': len(component.dependents)
-                        },
-                        'recommendation': 'Reduce coupling by extracting responsibilities'
-                    })
+            god_severity = np.where(coupling_scores > GOD_OBJECT_CRITICAL_COUPLING, 'critical', 'high')
+            for i in np.flatnonzero(flags & SMELL_GOD_OBJECT):
+                code_smells.append({
+                    'type': 'god_object',
+                    'component': table.names[i],
+                    'severity': str(god_severity[i]),
+                    'metrics': {
+                        'coupling_score': int(coupling_scores[i]),
+                        'dependencies': int(dependency_counts[i]),
+                        'dependents': int(dependent_counts[i])
+                    },
+                    'recommendation': 'Reduce coupling by extracting responsibilities'
+                })
             
             # Dead code detection (no dependents)
-            for component in components:
-                if len(component.dependents) == 0 and component.type in ['class', 'function']:
-                    code_smells.append({
-                        'type': 'dead_code',
-                        'component': component.name,
-                        'severity': 'low',
-                        'recommendation': 'Consider removing if truly unused'
-                    })
+            for i in np.flatnonzero(flags & SMELL_DEAD_CODE):
+                code_smells.append({
+                    'type': 'dead_code',
+                    'component': table.names[i],
+                    'severity': 'low',
+                    'recommendation': 'Consider removing if truly unused'
+                })
             
-            logger.info(f"Detected {len(code_smells)} code smells")
+            logger.info("Detected %d code smells", len(code_smells))
             return code_smells
             
         except Exception as e:
-            logger.error(f"Code smell detection failed: {str(e)}")
+            logger.error("Code smell detection failed: %s", e)
             return []
     
-    async def _analyze_code_file(self, project_id: str, file_path: str) -> Optional[Tuple[List[CodeComponent], List[str]]]:
-        """Analyze a single code file"""
-        try:
-            # Determine language from file extension
-            file_ext = Path(file_path).suffix.lower()
-            language = {
-                '.py': 'python',
-                '.js': 'javascript',
-                '.ts': 'typescript',
-                '.java': 'java'
-            }.get(file_ext)
-            
-            if not language:
+    async def _analyze_code_file(self, project_id: str, file_path: str,
+                                 cache_key: Optional[str] = None,
+                                 cached_parses: Optional[Dict[str, Any]] = None,
+                                 new_parses: Optional[Dict[str, Any]] = None) -> Optional[Tuple[List[CodeComponent], List[str]]]:
+        """
+        Analyze a single code file in the parser process pool, skipping files parsed before.
+        Fresh parses are added to ``new_parses`` for the caller to store.
+        Parse errors propagate so the caller can summarize them.
+        """
+        result = cached_parses.get(cache_key) if cache_key and cached_parses else None
+        
+        if result is None:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(_get_parse_pool(), _parse_code_file, file_path)
+            if result is None:
                 return None
-            
-            # Mock file content for demo (in production, read from storage)
-            content = f"# Mock {language} file content for {file_path}"
-            
-            # Parse based on language
-            if language == 'python':
-                return await self._parse_python_file(file_path, content)
-            else:
-                return await self._parse_generic_file(file_path, content, language)
-            
-        except Exception as e:
-            logger.error(f"File analysis failed for {file_path}: {str(e)}")
-            return None
-    
-    async def _parse_python_file(self, file_path: str, content: str) -> Tuple[List[CodeComponent], List[str]]:
-        """Parse Python file and extract components and dependencies"""
-        try:
-            # Mock Python analysis
-            components = [
-                CodeComponent(
-                    name=f"MockClass_{Path(file_path).stem}",
-                    type='class',
-                    file_path=file_path,
-                    start_line=1,
-                    end_line=50,
-                    complexity=CodeComplexity.MEDIUM,
-                    dependencies=['os', 'sys', 'json'],
-                    dependents=[],
-                    methods=['__init__', 'process', 'validate'],
-                    attributes=['data', 'config'],
-                    docstring="Mock class for demonstration",
-                    patterns=[ArchitecturalPattern.SINGLETON]
-                )
-            ]
-            
-            dependencies = ['os', 'sys', 'json']
-            return components, dependencies
-            
-        except Exception as e:
-            logger.error(f"Python parsing failed for {file_path}: {str(e)}")
-            return [], []
-    
-    async def _parse_generic_file(self, file_path: str, content: str, language: str) -> Tuple[List[CodeComponent], List[str]]:
-        """Parse generic file"""
-        try:
-            components = [
-                CodeComponent(
-                    name=f"Mock{language.title()}Component_{Path(file_path).stem}",
-                    type='module',
-                    file_path=file_path,
-                    start_line=1,
-                    end_line=30,
-                    complexity=CodeComplexity.LOW,
-                    dependencies=[],
-                    dependents=[],
-                    methods=[],
-                    attributes=[],
-                    docstring=f"Mock {language} component",
-                    patterns=[]
-                )
-            ]
-            
-            return components, []
-            
-        except Exception as e:
-            logger.error(f"Generic parsing failed for {file_path}: {str(e)}")
-            return [], []
+            if cache_key and new_parses is not None:
+                new_parses[cache_key] = result
+        
+        component_dicts, dependencies = result
+        return [_component_from_dict(data) for data in component_dicts], dependencies
     
-    def _build_dependency_graph(self, dependencies: List[str]) -> Dict[str, List[str]]:
-        """Build dependency graph from dependency relations"""
-        # Mock dependency graph
-        return {
-            'component_a': ['component_b', 'component_c'],
-            'component_b': ['component_d'],
-            'component_c': ['component_d']
-        }
+    def _build_dependency_graph(self, components: List[CodeComponent],
+                                dependency_ids: Optional[Dict[str, int]] = None) -> DependencyGraph:
+        """Build dependency graph from component dependency relations"""
+        return DependencyGraph.from_components(components, dependency_ids)
     
     async def _detect_architectural_patterns(self, components: List[CodeComponent], 
                                            dependencies: List[str]) -> List[ArchitecturalPattern]:
         """Detect architectural patterns in the codebase"""
-        detected_patterns = []
-        
         # Simple pattern detection based on component names
-        component_names = [comp.name.lower() for comp in components]
-        
-        if any('controller' in name for name in component_names):
-            detected_patterns.append(ArchitecturalPattern.MVC)
-        
-        if any('repository' in name for name in component_names):
-            detected_patterns.append(ArchitecturalPattern.REPOSITORY)
-        
-        if any('factory' in name for name in component_names):
-            detected_patterns.append(ArchitecturalPattern.FACTORY)
-        
-        return detected_patterns
+        return list(_patterns_from_names([comp.name.lower() for comp in components]))
     
     def _analyze_code_complexity(self, components: List[CodeComponent]) -> Dict[str, Any]:
         """Analyze overall code complexity"""
         if not components:
             return {}
         
-        complexity_counts = Counter(comp.complexity for comp in components)
-        total_components = len(components)
+        # Only the complexity column is needed, so skip building a full ComponentTable
+        complexity_codes = np.fromiter(
+            (COMPLEXITY_CODES[comp.complexity] for comp in components), dtype=np.uint8, count=len(components)
+        )
+        complexity_counts = np.bincount(complexity_codes, minlength=len(COMPLEXITY_LEVELS))
+        high_mask = complexity_codes >= COMPLEXITY_CODES[CodeComplexity.HIGH]
         
         return {
-            'total_components': total_components,
+            'total_components': len(components),
             'complexity_distribution': {
-                'low': complexity_counts[CodeComplexity.LOW],
-                'medium': complexity_counts[CodeComplexity.MEDIUM],
-                'high': complexity_counts[CodeComplexity.HIGH],
-                'critical': complexity_counts[CodeComplexity.CRITICAL]
+                level.value: int(complexity_counts[code]) for level, code in COMPLEXITY_CODES.items()
             },
             'average_complexity': 2.0,  # Mock average
-            'high_complexity_components': [
-                comp.name for comp in components 
-                if comp.complexity in [CodeComplexity.HIGH, CodeComplexity.CRITICAL]
-            ]
+            'high_complexity_components': [components[i].name for i in np.flatnonzero(high_mask)]
         }
     
     async def _generate_architectural_insights(self, project_id: str, 
                                              components: List[CodeComponent],
                                              dependencies: List[str],
-                                             patterns: List[ArchitecturalPattern]) -> List[ArchitecturalInsight]:
+                                             patterns: List[ArchitecturalPattern],
+                                             created_at: Optional[datetime] = None) -> List[ArchitecturalInsight]:
         """Generate architectural insights"""
         insights = []
+        created_at = created_at or datetime.utcnow()
+        pattern_set = set(patterns)
+        
+        # Collect controllers and critical components in one pass
+        controller_names = []
+        high_complexity_components = []
+        for comp in components:
+            if 'controller' in comp.name.lower():
+                controller_names.append(comp.name)
+            if comp.complexity is CodeComplexity.CRITICAL:
+                high_complexity_components.append(comp)
         
         # Pattern-based insights
-        if ArchitecturalPattern.MVC in patterns:
+        if ArchitecturalPattern.MVC in pattern_set:
             insights.append(ArchitecturalInsight(
                 insight_id=f"mvc_pattern_{project_id}",
                 title="MVC Pattern Detected",
@@ -401,12 +748,11 @@ class CodeArchitectureService:
                     "Maintain consistent naming conventions"
                 ],
                 impact_level='medium',
-                affected_components=[comp.name for comp in components if 'controller' in comp.name.lower()],
-                created_at=datetime.utcnow()
+                affected_components=controller_names,
+                created_at=created_at
             ))
         
         # Complexity insights
-        high_complexity_components = [comp for comp in components if comp.complexity == CodeComplexity.CRITICAL]
         if high_complexity_components:
             insights.append(ArchitecturalInsight(
                 insight_id=f"high_complexity_{project_id}",
@@ -421,7 +767,7 @@ class CodeArchitectureService:
                 ],
                 impact_level='high',
                 affected_components=[comp.name for comp in high_complexity_components],
-                created_at=datetime.utcnow()
+                created_at=created_at
             ))
         
         return insights
@@ -432,26 +778,23 @@ class CodeArchitectureService:
                                                    patterns: List[ArchitecturalPattern]):
         """Store architecture information in knowledge graph"""
         try:
-            # Store components as entities
-            entities = []
-            for comp in components:
-                entities.append({
-                    'project_id': project_id,
-                    'entity_type': 'code_component',
-                    'entity_id': comp.name,
-                    'properties': {
-                        'type': comp.type,
-                        'file_path': comp.file_path,
-                        'complexity': comp.complexity.value,
-                        'method_count': len(comp.methods),
-                        'line_count': comp.end_line - comp.start_line
-                    }
-                })
+            # Store components as entities, built off the event loop
+            loop = asyncio.get_running_loop()
+            entities = await loop.run_in_executor(None, _build_component_entities, project_id, components)
+            
+            # Write in bounded chunks with a cap on in-flight batches
+            semaphore = asyncio.Semaphore(ENTITY_WRITE_CONCURRENCY)
+            
+            async def write_batch(batch: List[Dict[str, Any]]):
+                async with semaphore:
+                    await self.knowledge_graph.add_entities_batch(batch)
             
-            if entities:
-                await self.knowledge_graph.add_entities_batch(entities)
+            await asyncio.gather(*[
+                write_batch(entities[i:i + ENTITY_BATCH_SIZE])
+                for i in range(0, len(entities), ENTITY_BATCH_SIZE)
+            ])
             
-            logger.info(f"Stored {len(entities)} components in knowledge graph")
+            logger.info("Stored %d components in knowledge graph", len(entities))
             
         except Exception as e:
-            logger.error(f"Failed to store architecture in knowledge graph: {str(e)}")
+            logger.error("Failed to store architecture in knowledge graph: %s", e)
@@ -7,11 +7,15 @@ import json
 import logging
 import asyncio
 from typing import Dict, List, Set, Optional, Any, Tuple
-from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass
 from enum import Enum
+import time
 import uuid
-from collections import defaultdict
+from abc import ABC, abstractmethod
+from array import array
+from collections import defaultdict, deque, OrderedDict
+from itertools import islice
 
 from .websocket_manager import WebSocketManager, WebSocketMessage, MessageType
 from .live_notifications import LiveNotificationService
@@ -20,6 +24,35 @@ from .knowledge_synthesis import MultiSourceKnowledgeSynthesis
 
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between cursor broadcasts for one user; moves in between are coalesced
+CURSOR_BROADCAST_INTERVAL = 0.05
+
+# Collaboration events for a project are queued and sent together at most this often
+EVENT_BATCH_INTERVAL = 0.05
+
+# Newest insight and comment ids kept per project for collaboration state
+RECENT_ITEMS_PER_PROJECT = 200
+
+# How often the cached clock used by high-frequency events is refreshed
+CLOCK_TICK_INTERVAL = 0.02
+
+# Write-behind persistence of shared items
+PERSIST_QUEUE_SIZE = 10000
+PERSIST_BATCH_SIZE = 64
+
+# Relevance given to a shared insight until background scoring completes
+DEFAULT_INSIGHT_RELEVANCE = 0.5
+
+# Largest cursor line or column; cursor columns are stored as signed 32-bit ints
+MAX_CURSOR_COORDINATE = 2**31 - 1
+
+# Limits on in-memory collaboration state
+MAX_SELECTED_TEXT = 200  # characters of a selection kept and broadcast
+MAX_SHARED_AI_SESSIONS = 1000
+MAX_ACTIVITY_TYPES_PER_USER = 20
+PRESENCE_TTL = timedelta(minutes=10)  # cursor/selection age before the entry is dropped
+PRESENCE_REAP_INTERVAL = 60  # seconds
+
 class CollaborationEventType(Enum):
     """Types of collaboration events"""
     # Cursor and selection
@@ -47,23 +80,70 @@ class CollaborationEventType(Enum):
     DECISION_PROPOSED = "decision_proposed"
     KNOWLEDGE_UPDATED = "knowledge_updated"
 
+# Wire codes sent as 't' in collaboration events in place of the event type name.
+# Codes are part of the client protocol: append new types, never renumber.
+EVENT_TYPE_CODES: Dict[CollaborationEventType, int] = {
+    CollaborationEventType.CURSOR_MOVED: 1,
+    CollaborationEventType.TEXT_SELECTED: 2,
+    CollaborationEventType.SELECTION_CLEARED: 3,
+    CollaborationEventType.FILE_OPENED: 4,
+    CollaborationEventType.FILE_CLOSED: 5,
+    CollaborationEventType.FILE_EDITED: 6,
+    CollaborationEventType.AI_QUERY_STARTED: 7,
+    CollaborationEventType.AI_QUERY_SHARED: 8,
+    CollaborationEventType.INSIGHT_SHARED: 9,
+    CollaborationEventType.COMMENT_ADDED: 10,
+    CollaborationEventType.COMMENT_REPLIED: 11,
+    CollaborationEventType.DISCUSSION_STARTED: 12,
+    CollaborationEventType.ANALYSIS_SHARED: 13,
+    CollaborationEventType.DECISION_PROPOSED: 14,
+    CollaborationEventType.KNOWLEDGE_UPDATED: 15,
+}
+
 class CollaborationScope(Enum):
     """Scope of collaboration"""
     FILE = "file"
     PROJECT = "project"
     GLOBAL = "global"
 
+class SerializableMixin(ABC):
+    """Caches a dataclass's dict form until it is invalidated by a mutation"""
+    _cached_dict: Optional[Dict[str, Any]] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get a copy of the dict form, building it on first use"""
+        if self._cached_dict is None:
+            self._cached_dict = self._build_dict()
+        return dict(self._cached_dict)
+    
+    def invalidate_dict(self):
+        """Drop the cached dict form after an in-place change"""
+        self._cached_dict = None
+    
+    @abstractmethod
+    def _build_dict(self) -> Dict[str, Any]:
+        """Build the dict form from the current field values"""
+
 @dataclass
 class CursorPosition:
-    """Represents a user's cursor position"""
+    """Represents a user's cursor position, built on demand from the cursor columns"""
     user_id: str
     file_path: str
     line: int
     column: int
     timestamp: datetime
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'user_id': self.user_id,
+            'file_path': self.file_path,
+            'line': self.line,
+            'column': self.column,
+            'timestamp': self.timestamp
+        }
 
 @dataclass
-class TextSelection:
+class TextSelection(SerializableMixin):
     """Represents a user's text selection"""
     user_id: str
     file_path: str
@@ -71,11 +151,25 @@ class TextSelection:
     start_column: int
     end_line: int
     end_column: int
-    selected_text: str
+    selected_text: str  # truncated to MAX_SELECTED_TEXT
+    char_count: int  # length of the full selection
     timestamp: datetime
+    
+    def _build_dict(self) -> Dict[str, Any]:
+        return {
+            'user_id': self.user_id,
+            'file_path': self.file_path,
+            'start_line': self.start_line,
+            'start_column': self.start_column,
+            'end_line': self.end_line,
+            'end_column': self.end_column,
+            'selected_text': self.selected_text,
+            'char_count': self.char_count,
+            'timestamp': self.timestamp
+        }
 
 @dataclass
-class SharedInsight:
+class SharedInsight(SerializableMixin):
     """Represents a shared AI insight"""
     insight_id: str
     shared_by: str
@@ -89,9 +183,26 @@ class SharedInsight:
     context: Dict[str, Any]
     tags: List[str]
     reactions: Dict[str, List[str]]  # reaction_type -> list of user_ids
+    
+    def _build_dict(self) -> Dict[str, Any]:
+        # Containers are copied one level deep so later in-place changes do not leak in
+        return {
+            'insight_id': self.insight_id,
+            'shared_by': self.shared_by,
+            'project_id': self.project_id,
+            'title': self.title,
+            'content': self.content,
+            'insight_type': self.insight_type,
+            'relevance_score': self.relevance_score,
+            'created_at': self.created_at,
+            'shared_at': self.shared_at,
+            'context': dict(self.context),
+            'tags': list(self.tags),
+            'reactions': {reaction: list(users) for reaction, users in self.reactions.items()}
+        }
 
 @dataclass
-class CollaborativeComment:
+class CollaborativeComment(SerializableMixin):
     """Represents a collaborative comment"""
     comment_id: str
     author_id: str
@@ -105,6 +216,23 @@ class CollaborativeComment:
     resolved: bool = False
     resolved_by: Optional[str] = None
     resolved_at: Optional[datetime] = None
+    
+    def _build_dict(self) -> Dict[str, Any]:
+        # Containers are copied one level deep so later in-place changes do not leak in
+        return {
+            'comment_id': self.comment_id,
+            'author_id': self.author_id,
+            'project_id': self.project_id,
+            'content': self.content,
+            'context': dict(self.context),
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'replies': list(self.replies),
+            'mentions': list(self.mentions),
+            'resolved': self.resolved,
+            'resolved_by': self.resolved_by,
+            'resolved_at': self.resolved_at
+        }
 
 @dataclass
 class CollaborationSession:
@@ -141,7 +269,6 @@ class CollaborativeFeaturesService:
         self.knowledge_synthesis = MultiSourceKnowledgeSynthesis()
         
         # Collaboration state
-        self.cursor_positions: Dict[str, CursorPosition] = {}  # user_id -> position
         self.text_selections: Dict[str, TextSelection] = {}   # user_id -> selection
         self.shared_insights: Dict[str, SharedInsight] = {}   # insight_id -> insight
         self.comments: Dict[str, CollaborativeComment] = {}   # comment_id -> comment
@@ -149,13 +276,58 @@ class CollaborativeFeaturesService:
         
         # Project-based tracking
         self.project_participants: Dict[str, Set[str]] = defaultdict(set)  # project_id -> user_ids
-        self.user_activities: Dict[str, Dict[str, datetime]] = defaultdict(dict)  # user_id -> activity -> timestamp
+        self.session_connections: Dict[Tuple[str, str], int] = defaultdict(int)  # (project_id, user_id) -> open connections
+        self.insights_by_project: Dict[str, deque] = defaultdict(
+            lambda: deque(maxlen=RECENT_ITEMS_PER_PROJECT)
+        )  # project_id -> insight_ids, newest first
+        self.comments_by_project: Dict[str, deque] = defaultdict(
+            lambda: deque(maxlen=RECENT_ITEMS_PER_PROJECT)
+        )  # project_id -> comment_ids, newest first
+        self.ai_sessions_by_project: Dict[str, int] = defaultdict(int)  # project_id -> shared AI session count
+        self.user_activities: Dict[str, "OrderedDict[str, datetime]"] = defaultdict(OrderedDict)  # user_id -> activity -> timestamp
+        
+        # Small per-user indexes for the cursor columns and file collaborator sets
+        self._user_indexes: Dict[str, int] = {}  # user_id -> index
+        self._indexed_users: List[Optional[str]] = []  # index -> user_id, None once released
+        self._free_indexes: List[int] = []  # released indexes, reused before new ones
         
-        # File-based collaboration
-        self.file_collaborators: Dict[str, Set[str]] = defaultdict(set)  # file_path -> user_ids
+        # Cursor positions as columns indexed by user index, updated in place on every move;
+        # CursorPosition objects are only built on the read paths
+        self._cursor_file: List[Optional[str]] = []  # None when the user has no cursor
+        self._cursor_line = array('i')
+        self._cursor_column = array('i')
+        self._cursor_ts = array('d')  # UTC epoch seconds, also the user's last cursor_moved activity
+        
+        # File-based collaboration, stored as user indexes rather than user id strings
+        self.file_collaborators: Dict[str, Set[int]] = defaultdict(set)  # file_path -> user indexes
         
         # AI collaboration
-        self.shared_ai_sessions: Dict[str, Dict[str, Any]] = {}  # session_id -> session_data
+        self.shared_ai_sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # session_id -> session_data, oldest first
+        
+        # Context writes are queued and persisted in batches by a background worker
+        self._persist_queue: asyncio.Queue = asyncio.Queue(maxsize=PERSIST_QUEUE_SIZE)
+        self.persist_task: Optional[asyncio.Task] = None
+        
+        # Insight relevance is scored in the background after the insight is shared
+        self._scoring_queue: asyncio.Queue = asyncio.Queue()
+        self.scoring_task: Optional[asyncio.Task] = None
+        
+        # Periodic cleanup of cursor and selection entries for users who have left
+        self.presence_reaper_task: Optional[asyncio.Task] = None
+        
+        # Cached wall clock for high-frequency events, refreshed by a background tick
+        self._now_ts = time.time()
+        self._now = self._from_timestamp(self._now_ts)
+        self.clock_task: Optional[asyncio.Task] = None
+        
+        # Cursor broadcast throttling
+        self._cursor_last_sent: Dict[str, float] = {}  # user_id -> loop time of last broadcast
+        self._cursor_flushes: Dict[str, asyncio.TimerHandle] = {}  # user_id -> pending trailing broadcast
+        self._cursor_flush_tasks: Set[asyncio.Task] = set()
+        
+        # Outbound event batching
+        self._pending_events: Dict[str, List[Tuple[str, Dict[str, Any]]]] = defaultdict(list)  # project_id -> (sender_id, event)
+        self._event_flushers: Dict[str, asyncio.Task] = {}  # project_id -> flush loop
     
     async def start_collaboration_session(self, project_id: str, user_id: str) -> CollaborationSession:
         """Start or join a collaboration session for a project"""
@@ -180,6 +352,7 @@ class CollaborativeFeaturesService:
             session.participants.add(user_id)
             session.last_activity = datetime.utcnow()
             self.project_participants[project_id].add(user_id)
+            self.session_connections[(project_id, user_id)] += 1
             
             # Notify other participants
             await self._broadcast_collaboration_event(
@@ -195,45 +368,132 @@ class CollaborativeFeaturesService:
             
         except Exception as e:
             logger.error(f"Failed to start collaboration session: {str(e)}")
-            raise
     
-    async def update_cursor_position(self, user_id: str, project_id: str,
-                                   file_path: str, line: int, column: int):
-        """Update and broadcast user's cursor position"""
+    async def leave_collaboration_session(self, project_id: str, user_id: str):
+        """Close one of a user's connections to a project's session, leaving it when the last one closes"""
         try:
-            cursor_position = CursorPosition(
-                user_id=user_id,
-                file_path=file_path,
-                line=line,
-                column=column,
-                timestamp=datetime.utcnow()
+            key = (project_id, user_id)
+            remaining = self.session_connections.get(key, 0) - 1
+            if remaining > 0:
+                self.session_connections[key] = remaining
+                return
+            self.session_connections.pop(key, None)
+            
+            participants = self.project_participants.get(project_id)
+            if participants is not None:
+                participants.discard(user_id)
+                if not participants:
+                    del self.project_participants[project_id]
+            
+            session = self.collaboration_sessions.get(project_id)
+            if session is not None:
+                session.participants.discard(user_id)
+                session.last_activity = datetime.utcnow()
+                if not session.participants:
+                    del self.collaboration_sessions[project_id]
+            
+            await self._broadcast_collaboration_event(
+                project_id, user_id, CollaborationEventType.AI_QUERY_STARTED,
+                {'action': 'user_left_session', 'user_id': user_id}
             )
             
-            self.cursor_positions[user_id] = cursor_position
-            self.file_collaborators[file_path].add(user_id)
+            if not any(user_id in users for users in self.project_participants.values()):
+                index = self._release_user(user_id)
+                if index is not None:
+                    self._drop_file_collaborators({index})
             
-            # Update activity
-            self._update_user_activity(user_id, 'cursor_moved')
+            logger.info(f"User {user_id} left collaboration session for project {project_id}")
             
-            # Broadcast to other users in the project
-            await self._broadcast_collaboration_event(
-                project_id, user_id, CollaborationEventType.CURSOR_MOVED,
-                {
-                    'file_path': file_path,
-                    'line': line,
-                    'column': column,
-                    'timestamp': cursor_position.timestamp.isoformat()
-                }
-            )
+        except Exception as e:
+            logger.error(f"Failed to leave collaboration session: {str(e)}")
+    
+    async def update_cursor_position(self, user_id: str, project_id: str,
+                                   file_path: str, line: int, column: int):
+        """Update and broadcast user's cursor position"""
+        try:
+            # Convert and check both coordinates before any cursor column is written
+            line = int(line)
+            column = int(column)
+            if not (0 <= line <= MAX_CURSOR_COORDINATE and 0 <= column <= MAX_CURSOR_COORDINATE):
+                logger.warning(f"Ignoring out-of-range cursor position {line}:{column} from {user_id}")
+                return
+            
+            index = self._user_index(user_id)
+            
+            # Idle typing, key repeats and focus events resend the same position
+            if (self._cursor_file[index] == file_path and self._cursor_line[index] == line
+                    and self._cursor_column[index] == column):
+                return
+            
+            self._cursor_line[index] = line
+            self._cursor_column[index] = column
+            self._cursor_ts[index] = self._current_timestamp()
+            if self._cursor_file[index] != file_path:
+                self._cursor_file[index] = file_path
+                self.file_collaborators[file_path].add(index)
+            
+            # The cursor timestamp doubles as the cursor_moved activity time
+            if self.presence_reaper_task is None:
+                self._start_presence_reaper()
+            
+            # A trailing broadcast is already scheduled and will send this latest position
+            if user_id in self._cursor_flushes:
+                return
+            
+            loop = asyncio.get_running_loop()
+            elapsed = loop.time() - self._cursor_last_sent.get(user_id, float('-inf'))
+            if elapsed >= CURSOR_BROADCAST_INTERVAL:
+                await self._flush_cursor(user_id, project_id)
+            else:
+                self._cursor_flushes[user_id] = loop.call_later(
+                    CURSOR_BROADCAST_INTERVAL - elapsed, self._schedule_cursor_flush, user_id, project_id
+                )
             
         except Exception as e:
             logger.error(f"Failed to update cursor position: {str(e)}")
     
+    def _schedule_cursor_flush(self, user_id: str, project_id: str):
+        """Timer callback that sends a user's coalesced cursor position"""
+        self._cursor_flushes.pop(user_id, None)
+        task = asyncio.create_task(self._flush_cursor(user_id, project_id))
+        self._cursor_flush_tasks.add(task)
+        task.add_done_callback(self._cursor_flush_tasks.discard)
+    
+    async def _flush_cursor(self, user_id: str, project_id: str):
+        """Broadcast a user's latest cursor position to other users in the project"""
+        index = self._user_indexes.get(user_id)
+        if index is None or self._cursor_file[index] is None:
+            return
+        
+        self._cursor_last_sent[user_id] = asyncio.get_running_loop().time()
+        timestamp = self._cursor_ts[index]
+        await self._broadcast_collaboration_event(
+            project_id, user_id, CollaborationEventType.CURSOR_MOVED,
+            {
+                'file_path': self._cursor_file[index],
+                'line': self._cursor_line[index],
+                'column': self._cursor_column[index],
+                'timestamp': self._now if timestamp == self._now_ts else self._from_timestamp(timestamp)
+            }
+        )
+    
     async def update_text_selection(self, user_id: str, project_id: str,
                                   file_path: str, start_line: int, start_column: int,
                                   end_line: int, end_column: int, selected_text: str):
         """Update and broadcast user's text selection"""
         try:
+            char_count = len(selected_text)
+            
+            previous = self.text_selections.get(user_id)
+            if (previous is not None and previous.file_path == file_path
+                    and (previous.start_line, previous.start_column, previous.end_line,
+                         previous.end_column, previous.char_count)
+                    == (start_line, start_column, end_line, end_column, char_count)):
+                return
+            
+            # Only a prefix of the selection is ever shown, so large pastes are not kept
+            selected_text = selected_text[:MAX_SELECTED_TEXT]
+            
             text_selection = TextSelection(
                 user_id=user_id,
                 file_path=file_path,
@@ -242,7 +502,8 @@ class CollaborativeFeaturesService:
                 end_line=end_line,
                 end_column=end_column,
                 selected_text=selected_text,
-                timestamp=datetime.utcnow()
+                char_count=char_count,
+                timestamp=self._current_time()
             )
             
             self.text_selections[user_id] = text_selection
@@ -259,8 +520,9 @@ class CollaborativeFeaturesService:
                     'start_column': start_column,
                     'end_line': end_line,
                     'end_column': end_column,
-                    'selected_text': selected_text[:100],  # Limit text length
-                    'timestamp': text_selection.timestamp.isoformat()
+                    'selected_text': selected_text,
+                    'char_count': char_count,
+                    'timestamp': text_selection.timestamp
                 }
             )
             
@@ -285,6 +547,12 @@ class CollaborativeFeaturesService:
             }
             
             self.shared_ai_sessions[session_id] = ai_session_data
+            self.ai_sessions_by_project[project_id] += 1
+            
+            # Evict the oldest shared sessions once over the limit
+            while len(self.shared_ai_sessions) > MAX_SHARED_AI_SESSIONS:
+                _, evicted = self.shared_ai_sessions.popitem(last=False)
+                self.ai_sessions_by_project[evicted['project_id']] -= 1
             
             # Update collaboration session
             if project_id in self.collaboration_sessions:
@@ -304,8 +572,8 @@ class CollaborativeFeaturesService:
                 }
             )
             
-            # Store in context for persistence
-            await self.context_service.store_context(
+            # Queue for persistence
+            await self._persist_context(
                 project_id=project_id,
                 user_id=user_id,
                 context_type=ContextType.AI_INTERACTION,
@@ -332,10 +600,8 @@ class CollaborativeFeaturesService:
         try:
             insight_id = str(uuid.uuid4())
             
-            # Generate relevance score based on context and project knowledge
-            relevance_score = await self._calculate_insight_relevance(
-                project_id, content, context
-            )
+            # Publish with a default score; the real score follows from the scoring worker
+            relevance_score = DEFAULT_INSIGHT_RELEVANCE
             
             shared_insight = SharedInsight(
                 insight_id=insight_id,
@@ -353,6 +619,7 @@ class CollaborativeFeaturesService:
             )
             
             self.shared_insights[insight_id] = shared_insight
+            self.insights_by_project[project_id].appendleft(insight_id)
             
             # Broadcast to team members
             await self._broadcast_collaboration_event(
@@ -368,27 +635,23 @@ class CollaborativeFeaturesService:
                 }
             )
             
-            # Send notifications to team members
-            team_members = list(self.project_participants.get(project_id, set()))
-            for member_id in team_members:
-                if member_id != user_id:
-                    await self.notification_service.notify_ai_analysis_complete(
-                        project_id, member_id, f"Shared {insight_type}", 1
+            # Send notifications to team members concurrently
+            participants = self.project_participants.get(project_id)
+            if participants:
+                analysis_type = f"Shared {insight_type}"
+                await asyncio.gather(*[
+                    self.notification_service.notify_ai_analysis_complete(
+                        project_id, member_id, analysis_type, 1
                     )
+                    for member_id in participants if member_id != user_id
+                ], return_exceptions=True)
             
-            # Store in context
-            await self.context_service.store_context(
-                project_id=project_id,
-                user_id=user_id,
-                context_type=ContextType.INSIGHT,
-                scope=ContextScope.PROJECT,
-                content=asdict(shared_insight),
-                metadata={
-                    'insight_id': insight_id,
-                    'shared': True,
-                    'relevance_score': relevance_score
-                }
-            )
+            await self._persist_insight(shared_insight)
+            
+            # Score relevance in the background; the stored insight is updated once scored
+            if self.scoring_task is None:
+                self.scoring_task = asyncio.create_task(self._scoring_worker())
+            self._scoring_queue.put_nowait(insight_id)
             
             logger.info(f"Insight shared by {user_id} in project {project_id}")
             return insight_id
@@ -423,6 +686,7 @@ class CollaborativeFeaturesService:
             )
             
             self.comments[comment_id] = comment
+            self.comments_by_project[project_id].appendleft(comment_id)
             
             # Broadcast comment to team
             await self._broadcast_collaboration_event(
@@ -436,13 +700,13 @@ class CollaborativeFeaturesService:
                 }
             )
             
-            # Store in context
-            await self.context_service.store_context(
+            # Queue for persistence
+            await self._persist_context(
                 project_id=project_id,
                 user_id=author_id,
                 context_type=ContextType.COMMENT,
                 scope=ContextScope.PROJECT,
-                content=asdict(comment),
+                content=comment.to_dict(),
                 metadata={
                     'comment_id': comment_id,
                     'mentions': mentioned_users
@@ -471,6 +735,7 @@ class CollaborativeFeaturesService:
             # Add reply to parent comment
             parent_comment = self.comments[parent_comment_id]
             parent_comment.replies.append(reply_id)
+            parent_comment.invalidate_dict()
             
             # Broadcast reply event
             await self._broadcast_collaboration_event(
@@ -502,6 +767,7 @@ class CollaborativeFeaturesService:
             
             if user_id not in insight.reactions[reaction]:
                 insight.reactions[reaction].append(user_id)
+                insight.invalidate_dict()
             
             # Broadcast reaction
             await self._broadcast_collaboration_event(
@@ -530,31 +796,25 @@ class CollaborativeFeaturesService:
             # Get cursor positions for project participants
             cursor_positions = {}
             for user_id in participants:
-                if user_id in self.cursor_positions:
-                    cursor_positions[user_id] = asdict(self.cursor_positions[user_id])
+                cursor = self._cursor_position(user_id)
+                if cursor is not None:
+                    cursor_positions[user_id] = cursor.to_dict()
             
             # Get text selections
             text_selections = {}
             for user_id in participants:
                 if user_id in self.text_selections:
-                    text_selections[user_id] = asdict(self.text_selections[user_id])
-            
-            # Get recent shared insights
-            recent_insights = []
-            for insight in self.shared_insights.values():
-                if insight.project_id == project_id:
-                    recent_insights.append(asdict(insight))
-            
-            # Sort by creation time
-            recent_insights.sort(key=lambda x: x['created_at'], reverse=True)
-            
-            # Get recent comments
-            recent_comments = []
-            for comment in self.comments.values():
-                if comment.project_id == project_id:
-                    recent_comments.append(asdict(comment))
-            
-            recent_comments.sort(key=lambda x: x['created_at'], reverse=True)
+                    text_selections[user_id] = self.text_selections[user_id].to_dict()
+            
+            # Get recent shared insights and comments, newest first
+            recent_insights = [
+                self.shared_insights[insight_id].to_dict()
+                for insight_id in islice(self.insights_by_project.get(project_id, ()), 10)
+            ]
+            recent_comments = [
+                self.comments[comment_id].to_dict()
+                for comment_id in islice(self.comments_by_project.get(project_id, ()), 20)
+            ]
             
             # Get collaboration session info
             session_info = {}
@@ -573,11 +833,10 @@ class CollaborativeFeaturesService:
                 'participants': participants,
                 'cursor_positions': cursor_positions,
                 'text_selections': text_selections,
-                'recent_insights': recent_insights[:10],  # Last 10 insights
-                'recent_comments': recent_comments[:20],  # Last 20 comments
+                'recent_insights': recent_insights,  # Last 10 insights
+                'recent_comments': recent_comments,  # Last 20 comments
                 'session_info': session_info,
-                'active_ai_sessions': len([s for s in self.shared_ai_sessions.values() 
-                                         if s.get('project_id') == project_id])
+                'active_ai_sessions': self.ai_sessions_by_project.get(project_id, 0)
             }
             
         except Exception as e:
@@ -588,14 +847,14 @@ class CollaborativeFeaturesService:
         """Get users currently collaborating on a file"""
         try:
             collaborators = []
-            user_ids = self.file_collaborators.get(file_path, set())
+            user_ids = [self._indexed_users[index] for index in self.file_collaborators.get(file_path, ())]
             
             for user_id in user_ids:
                 collaborator_info = {'user_id': user_id}
                 
                 # Add cursor position if available
-                if user_id in self.cursor_positions:
-                    cursor = self.cursor_positions[user_id]
+                cursor = self._cursor_position(user_id)
+                if cursor is not None:
                     if cursor.file_path == file_path:
                         collaborator_info['cursor'] = {
                             'line': cursor.line,
@@ -623,35 +882,263 @@ class CollaborativeFeaturesService:
             logger.error(f"Failed to get file collaborators: {str(e)}")
             return []
     
+    def _user_index(self, user_id: str) -> int:
+        """Small index for a user, allocated on first use from released indexes when possible"""
+        index = self._user_indexes.get(user_id)
+        if index is None:
+            if self._free_indexes:
+                index = self._free_indexes.pop()
+                self._indexed_users[index] = user_id
+            else:
+                index = len(self._indexed_users)
+                self._indexed_users.append(user_id)
+                self._cursor_file.append(None)
+                self._cursor_line.append(0)
+                self._cursor_column.append(0)
+                self._cursor_ts.append(0.0)
+            self._user_indexes[user_id] = index
+        return index
+    
+    def _release_user(self, user_id: str) -> Optional[int]:
+        """Drop a user's presence state and free their index; file collaborator sets are left to the caller"""
+        self.text_selections.pop(user_id, None)
+        self.user_activities.pop(user_id, None)
+        self._cursor_last_sent.pop(user_id, None)
+        flush = self._cursor_flushes.pop(user_id, None)
+        if flush is not None:
+            flush.cancel()
+        
+        index = self._user_indexes.pop(user_id, None)
+        if index is not None:
+            self._cursor_file[index] = None
+            self._indexed_users[index] = None
+            self._free_indexes.append(index)
+        return index
+    
+    def _drop_file_collaborators(self, indexes: Set[int]):
+        """Remove user indexes from every file's collaborator set"""
+        for file_path in list(self.file_collaborators):
+            collaborators = self.file_collaborators[file_path]
+            collaborators -= indexes
+            if not collaborators:
+                del self.file_collaborators[file_path]
+    
+    def _cursor_position(self, user_id: str) -> Optional[CursorPosition]:
+        """Build a user's current cursor position from the cursor columns"""
+        index = self._user_indexes.get(user_id)
+        if index is None or self._cursor_file[index] is None:
+            return None
+        return CursorPosition(
+            user_id=user_id,
+            file_path=self._cursor_file[index],
+            line=self._cursor_line[index],
+            column=self._cursor_column[index],
+            timestamp=self._from_timestamp(self._cursor_ts[index])
+        )
+    
+    def _current_time(self) -> datetime:
+        """UTC time as of the last clock tick, for events where ~20ms precision is enough"""
+        if self.clock_task is None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return datetime.utcnow()
+            self._start_clock_ticker()
+        return self._now
+    
+    def _current_timestamp(self) -> float:
+        """UTC epoch seconds as of the last clock tick"""
+        now = self._current_time()
+        if now is self._now:
+            return self._now_ts
+        return now.replace(tzinfo=timezone.utc).timestamp()
+    
+    @staticmethod
+    def _from_timestamp(timestamp: float) -> datetime:
+        """Naive UTC datetime for epoch seconds, matching datetime.utcnow()"""
+        return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+    
+    def _start_clock_ticker(self):
+        """Start the task that refreshes the cached clock"""
+        def tick():
+            self._now_ts = time.time()
+            self._now = self._from_timestamp(self._now_ts)
+        
+        async def clock_ticker():
+            while True:
+                await asyncio.sleep(CLOCK_TICK_INTERVAL)
+                tick()
+        
+        tick()
+        self.clock_task = asyncio.create_task(clock_ticker())
+    
+    async def _persist_context(self, **context: Any):
+        """Queue a context for the background writer, waiting only when the queue is full"""
+        if self.persist_task is None:
+            self.persist_task = asyncio.create_task(self._persist_worker())
+        
+        try:
+            self._persist_queue.put_nowait(context)
+        except asyncio.QueueFull:
+            await self._persist_queue.put(context)
+    
+    async def _persist_insight(self, insight: SharedInsight):
+        """Queue an insight for persistence under its insight ID, replacing any stored version"""
+        await self._persist_context(
+            context_id=insight.insight_id,
+            project_id=insight.project_id,
+            user_id=insight.shared_by,
+            context_type=ContextType.INSIGHT,
+            scope=ContextScope.PROJECT,
+            content=insight.to_dict(),
+            metadata={
+                'insight_id': insight.insight_id,
+                'shared': True,
+                'relevance_score': insight.relevance_score
+            }
+        )
+    
+    async def _persist_worker(self):
+        """Drain queued contexts in batches of up to PERSIST_BATCH_SIZE"""
+        while True:
+            batch = [await self._persist_queue.get()]
+            while len(batch) < PERSIST_BATCH_SIZE and not self._persist_queue.empty():
+                batch.append(self._persist_queue.get_nowait())
+            
+            # A later write for the same context supersedes an earlier one in the batch
+            contexts = list({context.get('context_id') or id(context): context for context in batch}.values())
+            
+            try:
+                await self.context_service.store_contexts_bulk(contexts)
+            except Exception as e:
+                logger.error(f"Failed to persist {len(batch)} collaboration contexts: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._persist_queue.task_done()
+    
     def _update_user_activity(self, user_id: str, activity_type: str):
         """Update user activity timestamp"""
-        self.user_activities[user_id][activity_type] = datetime.utcnow()
+        activities = self.user_activities[user_id]
+        activities[activity_type] = self._current_time()
+        activities.move_to_end(activity_type)
+        if len(activities) > MAX_ACTIVITY_TYPES_PER_USER:
+            activities.popitem(last=False)
+        
+        if self.presence_reaper_task is None:
+            self._start_presence_reaper()
+    
+    def _start_presence_reaper(self):
+        """Start the task that drops stale cursor and selection entries"""
+        async def presence_reaper():
+            while True:
+                try:
+                    await asyncio.sleep(PRESENCE_REAP_INTERVAL)
+                    self._reap_stale_presence()
+                except Exception as e:
+                    logger.error(f"Presence reaper error: {str(e)}")
+        
+        self.presence_reaper_task = asyncio.create_task(presence_reaper())
+    
+    def _reap_stale_presence(self):
+        """Drop cursor and selection entries older than PRESENCE_TTL and release users in no project"""
+        cutoff_ts = time.time() - PRESENCE_TTL.total_seconds()
+        cutoff = self._from_timestamp(cutoff_ts)
+        
+        stale_indexes = set()
+        for index, file_path in enumerate(self._cursor_file):
+            if file_path is not None and self._cursor_ts[index] < cutoff_ts:
+                self._cursor_file[index] = None
+                self._cursor_last_sent.pop(self._indexed_users[index], None)
+                stale_indexes.add(index)
+        
+        stale = [user_id for user_id, entry in self.text_selections.items() if entry.timestamp < cutoff]
+        for user_id in stale:
+            del self.text_selections[user_id]
+        
+        # Activities are kept newest last
+        idle = [
+            user_id for user_id, activities in self.user_activities.items()
+            if not activities or next(reversed(activities.values())) < cutoff
+        ]
+        for user_id in idle:
+            del self.user_activities[user_id]
+        
+        # Users with no cursor left who are in no project give up their index
+        active_users = set().union(*self.project_participants.values())
+        for user_id, index in list(self._user_indexes.items()):
+            if user_id not in active_users and self._cursor_file[index] is None:
+                self._release_user(user_id)
+                stale_indexes.add(index)
+        
+        if stale_indexes:
+            self._drop_file_collaborators(stale_indexes)
     
     async def _broadcast_collaboration_event(self, project_id: str, sender_id: str,
                                            event_type: CollaborationEventType,
                                            data: Dict[str, Any]):
-        """Broadcast collaboration event to project participants"""
+        """Queue a collaboration event for the next batched broadcast to project participants"""
         try:
-            message = WebSocketMessage(
-                message_id=str(uuid.uuid4()),
-                message_type=MessageType.USER_ACTIVITY,
-                timestamp=datetime.utcnow(),
-                sender_id=sender_id,
-                project_id=project_id,
-                data={
-                    'event_type': event_type.value,
-                    **data
-                },
-                metadata={'collaboration_event': True}
-            )
+            # Nobody else would receive it in a solo session
+            participants = self.project_participants.get(project_id)
+            if not participants or (len(participants) == 1 and sender_id in participants):
+                return
             
-            await self.websocket_manager.broadcast_to_project(
-                project_id, message, exclude_user=sender_id
-            )
+            self._pending_events[project_id].append((sender_id, {
+                't': EVENT_TYPE_CODES[event_type],
+                **data
+            }))
+            
+            if project_id not in self._event_flushers:
+                self._event_flushers[project_id] = asyncio.create_task(self._flush_events_loop(project_id))
             
         except Exception as e:
             logger.error(f"Failed to broadcast collaboration event: {str(e)}")
     
+    async def _flush_events_loop(self, project_id: str):
+        """Send queued events for a project every tick, stopping once the queue stays empty"""
+        try:
+            while True:
+                await asyncio.sleep(EVENT_BATCH_INTERVAL)
+                events = self._pending_events.pop(project_id, None)
+                if not events:
+                    break
+                await self._send_event_batch(project_id, events)
+        finally:
+            self._event_flushers.pop(project_id, None)
+    
+    async def _send_event_batch(self, project_id: str, events: List[Tuple[str, Dict[str, Any]]]):
+        """Broadcast queued events as one message per sender so senders never receive their own events"""
+        events_by_sender: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for sender_id, event in events:
+            events_by_sender[sender_id].append(event)
+        
+        for sender_id, sender_events in events_by_sender.items():
+            try:
+                # A lone event keeps the single-event message format
+                if len(sender_events) == 1:
+                    message_type = MessageType.USER_ACTIVITY
+                    data = sender_events[0]
+                else:
+                    message_type = MessageType.USER_ACTIVITY_BATCH
+                    data = {'batch': sender_events}
+                
+                message = WebSocketMessage(
+                    message_id=str(uuid.uuid4()),
+                    message_type=message_type,
+                    timestamp=self._current_time(),
+                    sender_id=sender_id,
+                    project_id=project_id,
+                    data=data,
+                    metadata={'collaboration_event': True}
+                )
+                
+                await self.websocket_manager.broadcast_to_project(
+                    project_id, message, exclude_user=sender_id
+                )
+                
+            except Exception as e:
+                logger.error(f"Failed to broadcast collaboration events: {str(e)}")
+    
     async def _send_session_state(self, project_id: str, user_id: str):
         """Send current collaboration session state to a user"""
         try:
@@ -665,7 +1152,8 @@ class CollaborativeFeaturesService:
                 project_id=project_id,
                 data={
                     'type': 'collaboration_state',
-                    'state': state
+                    'state': state,
+                    'event_codes': {str(code): event_type.value for event_type, code in EVENT_TYPE_CODES.items()}
                 },
                 metadata={}
             )
@@ -675,6 +1163,39 @@ class CollaborativeFeaturesService:
         except Exception as e:
             logger.error(f"Failed to send session state: {str(e)}")
     
+    async def _scoring_worker(self):
+        """Score queued insights, broadcast the updated score and update the stored insight"""
+        while True:
+            insight_id = await self._scoring_queue.get()
+            try:
+                insight = self.shared_insights.get(insight_id)
+                if insight is None:
+                    continue
+                
+                # Generate relevance score based on context and project knowledge
+                relevance_score = await self._calculate_insight_relevance(
+                    insight.project_id, insight.content, insight.context
+                )
+                insight.relevance_score = relevance_score
+                insight.invalidate_dict()
+                
+                # Sent as the system so the insight's author receives the score too
+                await self._broadcast_collaboration_event(
+                    insight.project_id, "system", CollaborationEventType.INSIGHT_SHARED,
+                    {
+                        'action': 'relevance_updated',
+                        'insight_id': insight_id,
+                        'relevance_score': relevance_score
+                    }
+                )
+                
+                await self._persist_insight(insight)
+                
+            except Exception as e:
+                logger.error(f"Failed to score insight {insight_id}: {str(e)}")
+            finally:
+                self._scoring_queue.task_done()
+    
     async def _calculate_insight_relevance(self, project_id: str, content: str,
                                          context: Dict[str, Any]) -> float:
         """Calculate relevance score for a shared insight"""
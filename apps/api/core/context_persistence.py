@@ -3,7 +3,6 @@ Context Persistence Service for NeuroSync
 Maintains project memory across sessions, conversation history, and contextual insights
 """
 
-import json
 import logging
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
@@ -13,12 +12,22 @@ import uuid
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
+import orjson
+
 from .vector_db import VectorDatabase
 from .knowledge_graph import KnowledgeGraphBuilder
 from .data_importance_filter import DataImportanceFilter
 
 logger = logging.getLogger(__name__)
 
+def _serialize_content(content: Dict[str, Any]) -> str:
+    """Serialize context content to JSON, including dataclasses, enums and datetimes"""
+    return orjson.dumps(
+        content,
+        default=str,
+        option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    ).decode()
+
 class ContextType(Enum):
     """Types of context that can be persisted"""
     CONVERSATION = "conversation"
@@ -115,7 +124,7 @@ class ContextPersistenceService:
     async def store_context(self, project_id: str, user_id: str, 
                            context_type: ContextType, scope: ContextScope,
                            content: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None,
-                           ttl: Optional[timedelta] = None) -> str:
+                           ttl: Optional[timedelta] = None, context_id: Optional[str] = None) -> str:
         """
         Store context with automatic importance scoring and persistence
         
@@ -127,14 +136,19 @@ class ContextPersistenceService:
             content: Context content
             metadata: Additional metadata
             ttl: Time to live for context
+            context_id: ID for the entry; an already stored entry with this ID is
+                overwritten. A new ID is generated when omitted
             
         Returns:
             Context entry ID
         """
         try:
+            # Serialize once for both importance scoring and the vector store
+            content_text = _serialize_content(content)
+            
             # Score context importance
             importance_score = await self._score_context_importance(
-                content, context_type, project_id, metadata or {}
+                content_text, context_type, project_id, metadata or {}
             )
             
             # Skip if importance is too low
@@ -142,8 +156,10 @@ class ContextPersistenceService:
                 logger.debug(f"Skipping context storage - low importance: {importance_score}")
                 return ""
             
-            # Create context entry
-            context_id = str(uuid.uuid4())
+            # Create context entry; a caller-given ID may name an entry that is already stored
+            replace = context_id is not None
+            previous = self.context_cache.get(context_id) if replace else None
+            context_id = context_id or str(uuid.uuid4())
             now = datetime.utcnow()
             
             # Determine TTL based on scope and importance
@@ -166,7 +182,7 @@ class ContextPersistenceService:
                 content=content,
                 metadata=metadata or {},
                 importance_score=importance_score,
-                created_at=now,
+                created_at=previous.created_at if previous else now,
                 updated_at=now,
                 expires_at=expires_at
             )
@@ -175,10 +191,11 @@ class ContextPersistenceService:
             self.context_cache[context_id] = context_entry
             
             # Store in vector database for semantic search
-            await self._store_context_in_vector_db(context_entry)
+            await self._store_context_in_vector_db(context_entry, content_text, replace=replace)
             
-            # Store in knowledge graph for relationship mapping
-            await self._store_context_in_knowledge_graph(context_entry)
+            # Store in knowledge graph for relationship mapping; an overwrite keeps the existing relationships
+            if previous is None:
+                await self._store_context_in_knowledge_graph(context_entry)
             
             # Update project memory if applicable
             if scope in [ContextScope.PROJECT, ContextScope.GLOBAL]:
@@ -191,6 +208,27 @@ class ContextPersistenceService:
             logger.error(f"Failed to store context: {str(e)}")
             raise
     
+    async def store_contexts_bulk(self, contexts: List[Dict[str, Any]]) -> List[str]:
+        """
+        Store several contexts concurrently
+        
+        Args:
+            contexts: Keyword arguments for store_context, one dict per context
+            
+        Returns:
+            Context entry IDs, with "" for entries that failed to store
+        """
+        results = await asyncio.gather(
+            *[self.store_context(**context) for context in contexts],
+            return_exceptions=True
+        )
+        
+        failed = sum(isinstance(result, Exception) for result in results)
+        if failed:
+            logger.error(f"Failed to store {failed} of {len(contexts)} contexts")
+        
+        return ["" if isinstance(result, Exception) else result for result in results]
+    
     async def retrieve_context(self, project_id: str, user_id: str,
                               context_types: Optional[List[ContextType]] = None,
                               scopes: Optional[List[ContextScope]] = None,
@@ -460,7 +498,7 @@ class ContextPersistenceService:
             logger.error(f"Context cleanup failed: {str(e)}")
             return {}
     
-    async def _score_context_importance(self, content: Dict[str, Any], 
+    async def _score_context_importance(self, content_text: str, 
                                        context_type: ContextType, project_id: str,
                                        metadata: Dict[str, Any]) -> float:
         """Score the importance of context for persistence decisions"""
@@ -478,7 +516,6 @@ class ContextPersistenceService:
             }.get(context_type, 0.3)
             
             # Content-based scoring
-            content_text = json.dumps(content, default=str)
             content_score = await self.importance_filter.score_data_importance(
                 content=content_text,
                 data_type="CONTEXT",
@@ -495,11 +532,10 @@ class ContextPersistenceService:
             logger.error(f"Failed to score context importance: {str(e)}")
             return 0.5  # Default moderate importance
     
-    async def _store_context_in_vector_db(self, context: ContextEntry):
-        """Store context in vector database for semantic search"""
+    async def _store_context_in_vector_db(self, context: ContextEntry, content_text: str,
+                                          replace: bool = False):
+        """Store context in vector database for semantic search, upserting when it may replace an entry"""
         try:
-            content_text = json.dumps(context.content, default=str)
-            
             document = {
                 'id': f"context_{context.id}",
                 'content': content_text,
@@ -515,7 +551,16 @@ class ContextPersistenceService:
                 }
             }
             
-            await self.vector_db.add_documents([document])
+            if replace:
+                embeddings = await self.vector_db.generate_embeddings([content_text])
+                await self.vector_db.upsert(
+                    embeddings,
+                    ids=[document['id']],
+                    metadatas=[document['metadata']],
+                    texts=[content_text]
+                )
+            else:
+                await self.vector_db.add_documents([document])
             
         except Exception as e:
             logger.error(f"Failed to store context in vector DB: {str(e)}")
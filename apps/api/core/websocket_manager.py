@@ -3,21 +3,27 @@ WebSocket Manager for NeuroSync
 Handles real-time communication, live updates, and collaborative features
 """
 
-import json
 import logging
 import asyncio
 from typing import Dict, List, Set, Optional, Any, Callable
 from datetime import datetime
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from enum import Enum
 import uuid
 from collections import defaultdict
 
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect
 from fastapi.websockets import WebSocketState
 
 logger = logging.getLogger(__name__)
 
+def _json_default(obj: Any) -> Any:
+    """Encode values orjson does not handle natively; anything else is a serialization error"""
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
 class MessageType(Enum):
     """Types of WebSocket messages"""
     # Connection management
@@ -37,6 +43,7 @@ class MessageType(Enum):
     
     # Collaboration
     USER_ACTIVITY = "user_activity"
+    USER_ACTIVITY_BATCH = "user_activity_batch"
     CURSOR_POSITION = "cursor_position"
     SELECTION_CHANGE = "selection_change"
     
@@ -252,12 +259,13 @@ class WebSocketManager:
             
             room = self.project_rooms[project_id]
             
-            # Send to all connected users in the room
+            # Serialize once and send the same payload to every connection
+            payload = self._serialize_message(message)
             for connection_id, user in room.connected_users.items():
                 if exclude_user and user.user_id == exclude_user:
                     continue
                 
-                await self._send_to_connection(connection_id, message)
+                await self._send_payload_to_connection(connection_id, payload)
             
             logger.debug(f"Broadcasted message to {len(room.connected_users)} users in project {project_id}")
             
@@ -532,8 +540,26 @@ class WebSocketManager:
             if not room.connected_users:
                 del self.project_rooms[project_id]
     
+    @staticmethod
+    def _serialize_message(message: WebSocketMessage) -> str:
+        """Serialize a message to JSON text; orjson writes dataclasses, datetimes and enums natively"""
+        return orjson.dumps(message, default=_json_default).decode()
+    
     async def _send_to_connection(self, connection_id: str, message: WebSocketMessage):
         """Send a message to a specific connection"""
+        if connection_id not in self.connections:
+            return
+        
+        try:
+            payload = self._serialize_message(message)
+        except TypeError as e:
+            logger.error(f"Failed to serialize message for connection {connection_id}: {str(e)}")
+            return
+        
+        await self._send_payload_to_connection(connection_id, payload)
+    
+    async def _send_payload_to_connection(self, connection_id: str, payload: str):
+        """Send an already serialized message to a specific connection"""
         try:
             if connection_id not in self.connections:
                 return
@@ -541,11 +567,7 @@ class WebSocketManager:
             connected_user = self.connections[connection_id]
             
             if connected_user.websocket.client_state == WebSocketState.CONNECTED:
-                message_dict = asdict(message)
-                message_dict['timestamp'] = message.timestamp.isoformat()
-                message_dict['message_type'] = message.message_type.value
-                
-                await connected_user.websocket.send_text(json.dumps(message_dict))
+                await connected_user.websocket.send_text(payload)
                 self.stats['messages_sent'] += 1
             
         except WebSocketDisconnect:
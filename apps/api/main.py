@@ -3,18 +3,21 @@ NeuroSync AI Backend - Main FastAPI Application
 Agentic AI System for Developer Knowledge Transfer
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import Optional, Dict, List, Any
 import uvicorn
 import asyncio
+import hashlib
 import logging
 from datetime import datetime
 import uuid
 import os
 import sys
+from cachetools import TTLCache
 
 # Add the current directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -37,6 +40,11 @@ from config.settings import get_settings
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
+# Skip LogRecord fields the log format never uses (caller frame lookup, thread and process info)
+logging._srcfile = None
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
@@ -45,7 +53,8 @@ app = FastAPI(
     description="Agentic AI System for Developer Knowledge Transfer",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -76,7 +85,11 @@ from services.database_service import DatabaseService
 db_service = DatabaseService()
 
 # Initialize core components with proper configuration
-ai_engine = AIEngine(config={"openai_api_key": settings.openai_api_key})
+ai_engine = AIEngine(config={
+    "openai_api_key": settings.openai_api_key,
+    "embedding_batch_size": settings.embedding_batch_size,
+    "ai_timeout": settings.ai_timeout
+})
 data_ingestion = DataIngestionEngine()
 vector_db = VectorDatabase()
 knowledge_graph = KnowledgeGraphBuilder()
@@ -113,11 +126,22 @@ async def shutdown_event():
     from services.database_service import db_service
     await db_service.close()
 
+# Users resolved for bearer tokens seen in the last second (polling and streaming clients)
+_recent_auth: TTLCache = TTLCache(maxsize=50000, ttl=1)
+
 # Authentication dependency
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Validate JWT token and return user info"""
+    auth_key = hashlib.blake2b(credentials.credentials.encode(), digest_size=16).digest()
+    user = _recent_auth.get(auth_key)
+    if user is not None:
+        request.state.user = user
+        return user
+    
     try:
         user = await auth_manager.validate_token(credentials.credentials)
+        _recent_auth[auth_key] = user
+        request.state.user = user
         return user
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid authentication token")
@@ -327,15 +351,14 @@ async def create_project(
         
         return ProjectResponse(
             status="success",
-            project_id=project_id,
-            name=request.name,
-            description=request.description,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
-            owner_id=current_user["user_id"],
-            team_members=[],
-            settings=request.settings or {},
-            stats={}
+            project=ProjectDetailSchema(
+                id=project_id,
+                name=request.name,
+                description=request.description,
+                created_at=datetime.utcnow(),
+                owner_id=current_user["user_id"],
+                settings=request.settings or {}
+            )
         )
         
     except Exception as e:
@@ -353,7 +376,7 @@ async def list_projects(current_user: Dict = Depends(get_current_user)):
         return ProjectListResponse(
             status="success",
             projects=[],
-            total=0,
+            total_count=0,
             page=1,
             page_size=10
         )
@@ -4,6 +4,7 @@ FastAPI middleware and dependencies for authentication and authorization
 """
 
 import logging
+from dataclasses import dataclass
 from typing import Optional, Annotated
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -280,7 +281,8 @@ require_professional = require_subscription_tier("professional")
 require_enterprise = require_subscription_tier("enterprise")
 
 # Token usage checkers for common operations
-require_query_tokens = create_token_usage_dependency(10)  # Estimated tokens for AI query
+QUERY_TOKEN_ESTIMATE = 10  # Estimated tokens for AI query
+require_query_tokens = create_token_usage_dependency(QUERY_TOKEN_ESTIMATE)
 require_ingestion_tokens = create_token_usage_dependency(5)  # Estimated tokens for data ingestion
 require_analysis_tokens = create_token_usage_dependency(15)  # Estimated tokens for analysis
 
@@ -298,3 +300,19 @@ async def log_api_usage(
     )
     
     return True
+
+@dataclass(slots=True)
+class QueryContext:
+    """Authenticated user and database session shared by AI query endpoints"""
+    user: User
+    db: Session
+
+async def query_context(
+    current_user: Annotated[User, Depends(require_query_tokens)],
+    db: Annotated[Session, Depends(get_database)],
+    _: Annotated[bool, Depends(log_api_usage)]
+) -> QueryContext:
+    """
+    Composite dependency for AI query endpoints: token check, DB session and usage logging
+    """
+    return QueryContext(user=current_user, db=db)
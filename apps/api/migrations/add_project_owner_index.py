@@ -0,0 +1,38 @@
+"""
+Database Migration: Add composite project listing index
+Adds (owner_id, is_active, created_at DESC) on projects so list_projects pages
+with an index scan instead of filtering every active project
+"""
+
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from config.settings import get_settings
+
+def run_migration():
+    """Create the composite project listing index"""
+    settings = get_settings()
+    
+    print("🔄 Starting database migration...")
+    
+    try:
+        engine = create_engine(settings.database_url)
+        
+        with engine.connect() as conn:
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_project_owner_active_created "
+                "ON projects (owner_id, is_active, created_at DESC)"
+            ))
+            conn.commit()
+            print("✅ Database migration completed successfully!")
+                
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    run_migration()
@@ -151,6 +151,7 @@ class Project(Base):
         Index('idx_project_owner', 'owner_id'),
         Index('idx_project_active', 'is_active'),
         Index('idx_project_created', 'created_at'),
+        Index('idx_project_owner_active_created', 'owner_id', 'is_active', created_at.desc()),
     )
 
 class Integration(Base):
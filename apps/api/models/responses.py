@@ -3,10 +3,11 @@ Response Models for NeuroSync AI Backend
 Pydantic models for API response validation.
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Dict, List, Any, Optional, Union
 from datetime import datetime
 from enum import Enum
+from uuid import UUID
 
 class StatusType(str, Enum):
     """Status types for responses."""
@@ -26,6 +27,7 @@ class HealthResponse(BaseResponse):
     """Health check response."""
     version: str
     services: Dict[str, str]
+    cache_stats: Optional[Dict[str, int]] = None
 
 # Authentication Responses
 class AuthResponse(BaseResponse):
@@ -94,22 +96,33 @@ class EmbeddingResponse(BaseResponse):
     cost: float
 
 # Project Management Responses
-class ProjectResponse(BaseResponse):
-    """Project response."""
-    project_id: str
+class ProjectSchema(BaseModel):
+    """Project summary read directly from a Project ORM row."""
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: UUID
     name: str
-    description: Optional[str]
+    description: Optional[str] = None
     created_at: datetime
-    updated_at: datetime
-    owner_id: str
-    team_members: List[Dict[str, Any]]
-    settings: Dict[str, Any]
-    stats: Dict[str, Any]
+    document_count: int = 0
+    last_sync_at: Optional[datetime] = None
+
+class ProjectDetailSchema(ProjectSchema):
+    """Project details read directly from a Project ORM row."""
+    owner_id: UUID
+    settings: Dict[str, Any] = {}
+    is_active: bool = True
+
+class ProjectResponse(BaseResponse):
+    """Project response."""
+    status: StatusType = StatusType.SUCCESS
+    project: ProjectDetailSchema
 
 class ProjectListResponse(BaseResponse):
     """Project list response."""
-    projects: List[ProjectResponse]
-    total: int
+    status: StatusType = StatusType.SUCCESS
+    projects: List[ProjectSchema]
+    total_count: int
     page: int
     page_size: int
 
@@ -22,6 +22,9 @@ router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
 security = HTTPBearer()
 settings = get_settings()
 
+# Admin tokens checked on every admin request, parsed once at import time
+ADMIN_TOKENS = frozenset(token for token in settings.admin_tokens.split(',') if token)
+
 # Admin role check dependency
 async def verify_admin_access(credentials = Depends(security)):
     """Verify admin access - only founders can access admin endpoints"""
@@ -31,9 +34,7 @@ async def verify_admin_access(credentials = Depends(security)):
         
         # For now, check against admin tokens in environment
         # In production, implement proper admin role system
-        admin_tokens = settings.admin_tokens.split(',') if hasattr(settings, 'admin_tokens') else []
-        
-        if token not in admin_tokens:
+        if token not in ADMIN_TOKENS:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Admin access required"
@@ -59,9 +60,7 @@ async def admin_login(request: dict):
             )
         
         # Check against admin tokens in environment
-        admin_tokens = settings.admin_tokens.split(',') if settings.admin_tokens else []
-        
-        if token not in admin_tokens:
+        if token not in ADMIN_TOKENS:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid admin token"
@@ -375,6 +374,7 @@ async def toggle_user_status(
             
             user.is_active = not user.is_active
             db.commit()
+            AuthManager.invalidate_user_everywhere(user_id)
             
             return {
                 "user_id": user_id,
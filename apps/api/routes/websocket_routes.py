@@ -155,6 +155,8 @@ async def websocket_endpoint(websocket: WebSocket,
         # Clean up connection
         if connection_id:
             await websocket_manager.disconnect_user(connection_id)
+            if project_id:
+                await collaboration_service.leave_collaboration_session(project_id, user_id)
 
 @router.post("/notifications/send")
 async def send_notification(request: SendNotificationRequest, 
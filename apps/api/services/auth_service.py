@@ -6,7 +6,7 @@ Handles JWT tokens, user authentication, and authorization
 import logging
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any, List
-import jwt
+from jose import jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 import secrets
@@ -22,7 +22,19 @@ class AuthService:
     
     def __init__(self):
         self.settings = get_settings()
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.pwd_context = CryptContext(
+            schemes=["argon2", "bcrypt"],
+            default="argon2",
+            deprecated="auto",
+            argon2__memory_cost=65536,
+            argon2__time_cost=3,
+            argon2__parallelism=2
+        )
+        
+        # JWT parameters used on every request, read from settings once
+        self.secret_key = self.settings.secret_key
+        self.jwt_algorithm = self.settings.jwt_algorithm
+        self.jwt_algorithms = [self.jwt_algorithm]
         
     def create_access_token(self, user_id: str, expires_delta: Optional[timedelta] = None) -> str:
         """Create a JWT access token for a user"""
@@ -40,8 +52,8 @@ class AuthService:
         
         encoded_jwt = jwt.encode(
             to_encode, 
-            self.settings.secret_key, 
-            algorithm=self.settings.jwt_algorithm
+            self.secret_key, 
+            algorithm=self.jwt_algorithm
         )
         return encoded_jwt
     
@@ -58,8 +70,8 @@ class AuthService:
         
         encoded_jwt = jwt.encode(
             to_encode, 
-            self.settings.secret_key, 
-            algorithm=self.settings.jwt_algorithm
+            self.secret_key, 
+            algorithm=self.jwt_algorithm
         )
         return encoded_jwt
     
@@ -68,8 +80,8 @@ class AuthService:
         try:
             payload = jwt.decode(
                 token, 
-                self.settings.secret_key, 
-                algorithms=[self.settings.jwt_algorithm]
+                self.secret_key, 
+                algorithms=self.jwt_algorithms
             )
             
             # Check if token is expired
@@ -354,8 +366,8 @@ class AuthService:
         
         encoded_jwt = jwt.encode(
             to_encode, 
-            self.settings.secret_key, 
-            algorithm=self.settings.jwt_algorithm
+            self.secret_key, 
+            algorithm=self.jwt_algorithm
         )
         return encoded_jwt
     
@@ -383,8 +395,8 @@ class AuthService:
         
         encoded_jwt = jwt.encode(
             to_encode, 
-            self.settings.secret_key, 
-            algorithm=self.settings.jwt_algorithm
+            self.secret_key, 
+            algorithm=self.jwt_algorithm
         )
         return encoded_jwt
     
@@ -0,0 +1,74 @@
+"""
+NeuroSync AI Backend - Counter Service
+Redis-backed counters for values that would otherwise need a COUNT(*) per request
+"""
+
+import logging
+from typing import Optional
+
+import redis.asyncio as aioredis
+from sqlalchemy.orm import Session
+
+from ..models.database import Project
+from ..config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+class CounterService:
+    """
+    Per-user counters kept in Redis and primed from the database on a miss.
+    Changes drop the counter rather than adjusting it, so the next read recounts.
+    Redis errors fall back to the database so limits are always enforced.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.redis_client: Optional[aioredis.Redis] = None
+        try:
+            self.redis_client = aioredis.from_url(
+                self.settings.get_redis_url(),
+                max_connections=self.settings.redis_max_connections,
+                decode_responses=True
+            )
+        except Exception as e:
+            logger.warning("Redis counters unavailable: %s - falling back to database counts", e)
+
+    @staticmethod
+    def _active_projects_key(user_id: str) -> str:
+        return f"projects:{user_id}:active_count"
+
+    async def get_active_projects(self, user_id: str, db: Session) -> int:
+        """Get a user's active project count, priming Redis from the database on a miss"""
+        key = self._active_projects_key(user_id)
+
+        if self.redis_client:
+            try:
+                cached = await self.redis_client.get(key)
+                if cached is not None:
+                    return int(cached)
+            except Exception as e:
+                logger.warning("Redis counter read failed: %s", e)
+
+        count = db.query(Project).filter(
+            Project.owner_id == user_id,
+            Project.is_active == True
+        ).count()
+
+        if self.redis_client:
+            try:
+                # Expire so any drift from missed updates corrects itself
+                await self.redis_client.set(key, count, ex=self.settings.cache_ttl)
+            except Exception as e:
+                logger.warning("Redis counter write failed: %s", e)
+
+        return count
+
+    async def invalidate_active_projects(self, user_id: str) -> None:
+        """Drop a user's project count after a change so the next read recounts it from the database"""
+        if not self.redis_client:
+            return
+
+        try:
+            await self.redis_client.delete(self._active_projects_key(user_id))
+        except Exception as e:
+            logger.warning("Redis counter invalidation failed: %s", e)
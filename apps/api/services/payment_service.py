@@ -220,6 +220,10 @@ class PaymentService:
                 
                 session.commit()
                 
+                # Import auth manager here to avoid circular imports
+                from core.auth import AuthManager
+                AuthManager.invalidate_user_everywhere(str(user.id))
+                
                 logger.info(f"Created subscription for user {user.id}, plan {plan}")
                 return True
                 
@@ -300,6 +304,10 @@ class PaymentService:
                 
                 session.commit()
                 
+                # Import auth manager here to avoid circular imports
+                from core.auth import AuthManager
+                AuthManager.invalidate_user_everywhere(user_id)
+                
                 logger.info(f"Cancelled subscription for user {user_id}")
                 return True
                 
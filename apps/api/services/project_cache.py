@@ -0,0 +1,63 @@
+"""
+NeuroSync AI Backend - Project Cache
+Short-lived cache of project rows for hot ingestion paths
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from cachetools import TTLCache
+from sqlalchemy.orm import Session
+
+from ..models.database import Project
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class ProjectSnapshot:
+    """Lightweight, immutable view of a project row"""
+    id: str
+    owner_id: str
+    document_count: int
+
+class ProjectCache:
+    """
+    TTL cache of project snapshots keyed by project id.
+    Lookups fall back to the database on a miss; writers refresh or invalidate entries.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 60.0):
+        self._cache: TTLCache = TTLCache(maxsize=max_size, ttl=ttl_seconds)
+        self._lock = asyncio.Lock()
+
+    async def get(self, db: Session, project_id: str) -> Optional[ProjectSnapshot]:
+        """Get a project snapshot, loading it from the database on a cache miss"""
+        key = str(project_id)
+        async with self._lock:
+            snapshot = self._cache.get(key)
+        if snapshot is not None:
+            return snapshot
+
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if not project:
+            return None
+
+        snapshot = ProjectSnapshot(
+            id=str(project.id),
+            owner_id=str(project.owner_id),
+            document_count=project.document_count or 0
+        )
+        await self.put(snapshot)
+        return snapshot
+
+    async def put(self, snapshot: ProjectSnapshot) -> None:
+        """Store or refresh a project snapshot"""
+        async with self._lock:
+            self._cache[snapshot.id] = snapshot
+
+    async def invalidate(self, project_id: str) -> None:
+        """Drop a cached project so the next lookup reads the database"""
+        async with self._lock:
+            self._cache.pop(str(project_id), None)
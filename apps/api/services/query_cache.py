@@ -0,0 +1,165 @@
+"""
+NeuroSync AI Backend - Query Cache
+Thread-safe TTL + LRU cache for vector search results
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, int, str]
+
+class QueryCache:
+    """
+    In-process cache of search results keyed on project, query text, limit and filters.
+    Entries expire after ``ttl_seconds`` and the least recently used entry is
+    evicted once ``max_size`` is reached.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+        # Searches currently being computed, shared with concurrent identical requests
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+
+        # Bumped by invalidate_project so searches started before it are not cached
+        self._generations: Dict[str, int] = {}
+
+        # Counters reported through /health
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(
+        project_id: str,
+        query: str,
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> CacheKey:
+        """Build a hashable cache key for a search"""
+        filters_key = json.dumps(filters, sort_keys=True, default=str) if filters else ""
+        return (str(project_id), query, limit, filters_key)
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        """Return cached results for a key, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, results = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return results
+
+    def generation(self, project_id: str) -> int:
+        """Return the project's invalidation generation, to be passed to put after a search"""
+        with self._lock:
+            return self._generations.get(str(project_id), 0)
+
+    def put(self, key: CacheKey, results: Any, generation: Optional[int] = None) -> None:
+        """Store results for a key, evicting the least recently used entry if full.
+
+        When ``generation`` is given and the key's project has been invalidated
+        since it was read, the results are stale and are not stored.
+        """
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            if generation is not None and self._generations.get(key[0], 0) != generation:
+                return
+
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, results)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def get_or_compute(self, key: CacheKey, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return cached results, or compute them once for all concurrent callers of the same key"""
+        results = self.get(key)
+        if results is not None:
+            return results
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            # Shield so a cancelled follower does not cancel the shared result
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self.generation(key[0])
+        try:
+            results = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when there are no followers
+            raise
+        else:
+            self.put(key, results, generation)
+            future.set_result(results)
+            return results
+        finally:
+            # invalidate_project may already have detached this search
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def invalidate_project(self, project_id: str) -> int:
+        """Drop every cached entry for a project and return how many were removed.
+
+        Searches for the project still in flight finish for their current callers,
+        but their results are not cached or shared with later callers.
+        """
+        project_id = str(project_id)
+        with self._lock:
+            self._generations[project_id] = self._generations.get(project_id, 0) + 1
+            stale_keys = [key for key in self._entries if key[0] == project_id]
+            for key in stale_keys:
+                del self._entries[key]
+
+        for key in [key for key in self._inflight if key[0] == project_id]:
+            del self._inflight[key]
+
+        if stale_keys:
+            logger.debug("Invalidated %d cached queries for project %s", len(stale_keys), project_id)
+        return len(stale_keys)
+
+    def clear(self) -> None:
+        """Remove all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get cache size and hit/miss/eviction counters"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced
+            }
@@ -3,8 +3,11 @@ NeuroSync AI Backend - Vector Store Service
 Handles embeddings, vector storage, and semantic search using ChromaDB
 """
 
+import asyncio
 import logging
 import uuid
+from dataclasses import dataclass, field
+from functools import partial
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import chromadb
@@ -16,6 +19,103 @@ from ..config.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
+@dataclass
+class SearchResults:
+    """Documents returned by a search, with their ids collected alongside"""
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    source_ids: List[str] = field(default_factory=list)
+
+class EmbedBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into batched model calls.
+    Requests arriving within ``max_wait_ms`` of each other share one encoder pass.
+    
+    The app lifespan calls ``start`` and ``stop``; ``submit`` restarts the worker
+    when called on a different event loop than the one it was started on.
+    """
+    
+    def __init__(self, model: SentenceTransformer, max_batch: int = 50, max_wait_ms: float = 10.0):
+        self.model = model
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Create the queue and worker task on the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._worker = self._loop.create_task(self._run(self._queue))
+    
+    async def stop(self):
+        """Cancel the worker task and any texts still waiting to be embedded"""
+        worker, queue = self._worker, self._queue
+        self._loop = self._queue = self._worker = None
+        
+        if worker is not None:
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        
+        while queue is not None and not queue.empty():
+            _, future = queue.get_nowait()
+            future.cancel()
+    
+    async def submit(self, text: str) -> List[float]:
+        """Queue a text for embedding and wait for its vector"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            # Not started on this loop, e.g. under a test client or after a reload
+            self.start()
+        
+        future = loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+    
+    async def _run(self, queue: asyncio.Queue):
+        """Drain the queue in batches of up to ``max_batch`` texts"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await queue.get()]
+            try:
+                deadline = loop.time() + self.max_wait
+                
+                while len(batch) < self.max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                
+                texts = [text for text, _ in batch]
+                try:
+                    # Encoding is CPU-bound; keep it off the event loop
+                    embeddings = await loop.run_in_executor(
+                        None, partial(self.model.encode, texts, batch_size=self.max_batch)
+                    )
+                except Exception as e:
+                    logger.error(f"Error generating batched embeddings: {str(e)}")
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                
+                for (_, future), embedding in zip(batch, embeddings):
+                    if not future.done():
+                        future.set_result(embedding.tolist())
+            
+            except asyncio.CancelledError:
+                # Stopped mid-batch; release the callers still waiting on it
+                for _, future in batch:
+                    future.cancel()
+                raise
+
 class VectorService:
     """Service for managing vector embeddings and semantic search"""
     
@@ -33,6 +133,10 @@ class VectorService:
         
         # Initialize embedding model
         self.embedding_model = SentenceTransformer(self.settings.embedding_model)
+        self.embed_batcher = EmbedBatcher(
+            self.embedding_model,
+            max_batch=self.settings.embedding_batch_size
+        )
         
         # Cache for collections
         self._collections = {}
@@ -141,48 +245,116 @@ class VectorService:
         query: str, 
         limit: int = 10,
         filters: Optional[Dict[str, Any]] = None
-    ) -> List[Dict[str, Any]]:
-        """Search for relevant documents using semantic similarity"""
+    ) -> SearchResults:
+        """Search for relevant documents using semantic similarity.
+        
+        Errors are logged and re-raised so callers never mistake a failed search
+        for one with no matches.
+        """
         collection = self.get_or_create_collection(project_id)
         
         try:
-            # Generate query embedding
-            query_embedding = self.embedding_model.encode(query).tolist()
+            # Generate query embedding, batched with concurrent searches
+            query_embedding = await self.embed_batcher.submit(query)
             
             # Prepare where clause for filtering
             where_clause = {}
             if filters:
                 where_clause = self._build_where_clause(filters)
             
-            # Search in ChromaDB
-            results = collection.query(
+            # Search in ChromaDB; the client call blocks, so run it off the event loop
+            results = await asyncio.get_running_loop().run_in_executor(None, partial(
+                collection.query,
                 query_embeddings=[query_embedding],
                 n_results=limit,
                 where=where_clause if where_clause else None,
                 include=["documents", "metadatas", "distances"]
-            )
+            ))
             
             # Process results
-            documents = []
-            if results['documents'] and results['documents'][0]:
-                for i, doc in enumerate(results['documents'][0]):
-                    document = {
-                        "id": results['ids'][0][i],
-                        "content": doc,
-                        "metadata": results['metadatas'][0][i],
-                        "relevance_score": 1 - results['distances'][0][i],  # Convert distance to similarity
-                        "source_type": results['metadatas'][0][i].get('source_type', 'unknown'),
-                        "file_path": results['metadatas'][0][i].get('file_path', ''),
-                        "title": results['metadatas'][0][i].get('title', '')
-                    }
-                    documents.append(document)
+            documents = self._process_query_results(results, 0)
             
-            logger.info(f"Found {len(documents)} relevant documents for query in project {project_id}")
+            logger.info(f"Found {len(documents.results)} relevant documents for query in project {project_id}")
             return documents
             
         except Exception as e:
             logger.error(f"Error searching documents: {str(e)}")
+            raise
+    
+    async def batch_search_documents(
+        self, 
+        project_id: str, 
+        queries: List[str], 
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[SearchResults]:
+        """Search for several queries against one project with a single embedding call.
+        
+        Identical query strings are embedded once; results are returned in the
+        same order as ``queries``. Errors are logged and re-raised.
+        """
+        if not queries:
             return []
+        
+        collection = self.get_or_create_collection(project_id)
+        
+        try:
+            # Deduplicate before embedding, keeping first-seen order
+            unique_queries = list(dict.fromkeys(queries))
+            
+            # Generate all query embeddings in one batched model call; encoding and
+            # the ChromaDB query both block, so they run off the event loop
+            loop = asyncio.get_running_loop()
+            query_embeddings = (await loop.run_in_executor(
+                None, partial(self.embedding_model.encode, unique_queries)
+            )).tolist()
+            
+            # Prepare where clause for filtering
+            where_clause = {}
+            if filters:
+                where_clause = self._build_where_clause(filters)
+            
+            # One ANN round-trip for every query embedding
+            results = await loop.run_in_executor(None, partial(
+                collection.query,
+                query_embeddings=query_embeddings,
+                n_results=limit,
+                where=where_clause if where_clause else None,
+                include=["documents", "metadatas", "distances"]
+            ))
+            
+            documents_by_query = {
+                query: self._process_query_results(results, i)
+                for i, query in enumerate(unique_queries)
+            }
+            
+            logger.info(f"Batch searched {len(queries)} queries ({len(unique_queries)} unique) in project {project_id}")
+            return [documents_by_query[query] for query in queries]
+            
+        except Exception as e:
+            logger.error(f"Error batch searching documents: {str(e)}")
+            raise
+    
+    def _process_query_results(self, results: Dict[str, Any], index: int) -> SearchResults:
+        """Convert the ChromaDB result set for one query embedding into documents"""
+        documents = SearchResults()
+        if results['documents'] and len(results['documents']) > index and results['documents'][index]:
+            ids = results['ids'][index]
+            metadatas = results['metadatas'][index]
+            distances = results['distances'][index]
+            for i, doc in enumerate(results['documents'][index]):
+                document = {
+                    "id": ids[i],
+                    "content": doc,
+                    "metadata": metadatas[i],
+                    "relevance_score": 1 - distances[i],  # Convert distance to similarity
+                    "source_type": metadatas[i].get('source_type', 'unknown'),
+                    "file_path": metadatas[i].get('file_path', ''),
+                    "title": metadatas[i].get('title', '')
+                }
+                documents.results.append(document)
+                documents.source_ids.append(ids[i])
+        return documents
     
     async def update_document(
         self, 
@@ -280,12 +452,12 @@ class VectorService:
             content_parts.append(f"File: {doc['file_path']}")
         
         # Add any additional text fields
-        for field in ['description', 'summary', 'tags']:
-            if doc.get(field):
-                if isinstance(doc[field], list):
-                    content_parts.append(f"{field.title()}: {', '.join(doc[field])}")
+        for field_name in ['description', 'summary', 'tags']:
+            if doc.get(field_name):
+                if isinstance(doc[field_name], list):
+                    content_parts.append(f"{field_name.title()}: {', '.join(doc[field_name])}")
                 else:
-                    content_parts.append(f"{field.title()}: {doc[field]}")
+                    content_parts.append(f"{field_name.title()}: {doc[field_name]}")
         
         content = "\n".join(content_parts)
         
@@ -337,11 +509,14 @@ class VectorService:
         limit: int = 10
     ) -> List[Dict[str, Any]]:
         """Search for documents with a minimum similarity score"""
-        all_results = await self.search_documents(project_id, query, limit * 2)  # Get more to filter
+        try:
+            all_results = await self.search_documents(project_id, query, limit * 2)  # Get more to filter
+        except Exception:
+            return []
         
         # Filter by score threshold
         filtered_results = [
-            doc for doc in all_results 
+            doc for doc in all_results.results 
             if doc['relevance_score'] >= score_threshold
         ]
         
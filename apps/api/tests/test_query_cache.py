@@ -0,0 +1,155 @@
+"""
+Tests for the vector search query cache
+Tests TTL expiry, LRU eviction, project invalidation, single-flight and stats counters
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from services.query_cache import QueryCache
+
+class TestQueryCache:
+    """Test suite for QueryCache"""
+
+    @pytest.fixture
+    def cache(self):
+        """Create a small query cache"""
+        return QueryCache(max_size=2, ttl_seconds=60)
+
+    def test_get_returns_put_results(self, cache):
+        """Test a stored search is returned for the same key"""
+        key = QueryCache.make_key("proj_1", "auth flow", 10, {"source_type": "github"})
+        results = [{"id": "doc_1"}]
+
+        assert cache.get(key) is None
+        cache.put(key, results)
+
+        assert cache.get(key) == results
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+
+    def test_key_ignores_filter_order(self):
+        """Test filter dicts with the same items produce the same key"""
+        key_a = QueryCache.make_key("proj_1", "q", 5, {"a": 1, "b": 2})
+        key_b = QueryCache.make_key("proj_1", "q", 5, {"b": 2, "a": 1})
+
+        assert key_a == key_b
+
+    def test_lru_eviction(self, cache):
+        """Test the least recently used entry is evicted when full"""
+        key_1 = QueryCache.make_key("proj_1", "one")
+        key_2 = QueryCache.make_key("proj_1", "two")
+        key_3 = QueryCache.make_key("proj_1", "three")
+
+        cache.put(key_1, [])
+        cache.put(key_2, [])
+        cache.get(key_1)  # key_2 is now least recently used
+        cache.put(key_3, [])
+
+        assert cache.get(key_2) is None
+        assert cache.get(key_1) == []
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        """Test entries are not served after their TTL"""
+        cache = QueryCache(max_size=10, ttl_seconds=0.01)
+        key = QueryCache.make_key("proj_1", "stale")
+        cache.put(key, [{"id": "doc_1"}])
+
+        time.sleep(0.02)
+
+        assert cache.get(key) is None
+        assert cache.get_stats()["size"] == 0
+
+    def test_invalidate_project(self, cache):
+        """Test invalidation only drops entries for the given project"""
+        key_1 = QueryCache.make_key("proj_1", "q")
+        key_2 = QueryCache.make_key("proj_2", "q")
+        cache.put(key_1, [])
+        cache.put(key_2, [])
+
+        assert cache.invalidate_project("proj_1") == 1
+        assert cache.get(key_1) is None
+        assert cache.get(key_2) == []
+
+    @pytest.mark.asyncio
+    async def test_get_or_compute_single_flight(self, cache):
+        """Test concurrent identical searches share one computation"""
+        key = QueryCache.make_key("proj_1", "trending question")
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return [{"id": "doc_1"}]
+
+        results = await asyncio.gather(*[cache.get_or_compute(key, compute) for _ in range(5)])
+
+        assert len(calls) == 1
+        assert all(result == [{"id": "doc_1"}] for result in results)
+        assert cache.get_stats()["coalesced"] == 4
+        assert await cache.get_or_compute(key, compute) == [{"id": "doc_1"}]
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_get_or_compute_propagates_errors(self, cache):
+        """Test a failed computation is not cached"""
+        key = QueryCache.make_key("proj_1", "broken")
+
+        async def compute():
+            raise RuntimeError("vector store down")
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute(key, compute)
+
+        assert cache.get(key) is None
+
+    @pytest.mark.asyncio
+    async def test_get_or_compute_failure_is_shared_not_cached(self, cache):
+        """Test coalesced followers see the leader's failure and the next call recomputes"""
+        key = QueryCache.make_key("proj_1", "flaky")
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("embedding failed")
+
+        results = await asyncio.gather(
+            *[cache.get_or_compute(key, failing) for _ in range(3)],
+            return_exceptions=True
+        )
+
+        assert len(calls) == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+        async def compute():
+            return [{"id": "doc_1"}]
+
+        assert await cache.get_or_compute(key, compute) == [{"id": "doc_1"}]
+        assert cache.get(key) == [{"id": "doc_1"}]
+
+    @pytest.mark.asyncio
+    async def test_search_overlapping_invalidation_is_not_cached(self, cache):
+        """Test results of a search started before invalidate_project are not cached"""
+        key = QueryCache.make_key("proj_1", "auth flow")
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def compute():
+            started.set()
+            await release.wait()
+            return [{"id": "pre_ingest"}]
+
+        task = asyncio.create_task(cache.get_or_compute(key, compute))
+        await started.wait()
+        cache.invalidate_project("proj_1")
+        release.set()
+
+        assert await task == [{"id": "pre_ingest"}]
+        assert cache.get(key) is None
+
+        cache.put(key, [{"id": "stale"}], generation=0)
+        assert cache.get(key) is None
@@ -0,0 +1,45 @@
+/**
+ * Collaboration event codes for NeuroSync
+ * Decodes the integer `t` field sent with real-time collaboration events
+ */
+
+// Must match EVENT_TYPE_CODES in apps/api/core/collaborative_features.py
+export const COLLABORATION_EVENT_TYPES = {
+  1: 'cursor_moved',
+  2: 'text_selected',
+  3: 'selection_cleared',
+  4: 'file_opened',
+  5: 'file_closed',
+  6: 'file_edited',
+  7: 'ai_query_started',
+  8: 'ai_query_shared',
+  9: 'insight_shared',
+  10: 'comment_added',
+  11: 'comment_replied',
+  12: 'discussion_started',
+  13: 'analysis_shared',
+  14: 'decision_proposed',
+  15: 'knowledge_updated',
+} as const
+
+export type CollaborationEventType =
+  (typeof COLLABORATION_EVENT_TYPES)[keyof typeof COLLABORATION_EVENT_TYPES]
+
+export interface CollaborationEvent {
+  event_type: CollaborationEventType | 'unknown'
+  [key: string]: any
+}
+
+export function decodeCollaborationEvent(event: { t: number; [key: string]: any }): CollaborationEvent {
+  const { t, ...data } = event
+  const eventType = COLLABORATION_EVENT_TYPES[t as keyof typeof COLLABORATION_EVENT_TYPES] ?? 'unknown'
+  return { ...data, event_type: eventType }
+}
+
+/**
+ * Decode a user_activity or user_activity_batch message payload into events
+ */
+export function decodeCollaborationEvents(data: { batch?: any[]; [key: string]: any }): CollaborationEvent[] {
+  const events = Array.isArray(data.batch) ? data.batch : [data]
+  return events.map((event) => decodeCollaborationEvent(event as { t: number }))
+}